@@ -1,25 +1,73 @@
 ﻿# A szükséges könyvtárak importálása
+# palette_trace - szakaszonkénti idő- és memóriamérés (dekódolás, klaszterezés, kirajzolás, mentés).
+# Elsőként töltődik be (csak a standard könyvtárat használja), mert az indulást is méri.
+import palette_trace
+
+# Az indulás mérése: a modul importja, majd az ablak első megjelenése és az előtöltés
+STARTUP_TRACE = palette_trace.Trace("Indulás")
+STARTUP_TRACE.begin("import")
+
 # tkinter - grafikus felhasználói felület (GUI) létrehozásához
 import tkinter as tk
 from tkinter import filedialog, messagebox
 # filedialog: fájl párbeszédablakok kezelésére (pl. kép betöltése)
 # messagebox: felugró információs és hibaüzenetek megjelenítésére
 
-# PIL (Pillow) - képkezelési funkciókhoz
-from PIL import Image, ImageTk
-# Image: képek megnyitására, manipulálására (átméretezés, konvertálás)
-# ImageTk: PIL képek konvertálása olyan formátumba, amit a tkinter is kezel
-
-# numpy - hatékony numerikus számításokhoz, a képpontok feldolgozásához
-import numpy as np
-
-# scikit-learn - gépi tanulási könyvtár
-from sklearn.cluster import MiniBatchKMeans
-# MiniBatchKMeans: egy klaszterező algoritmus, ami a KMeans egy memóriahatékonyabb változata.
-# Különösen hasznos nagy képek feldolgozásánál, mert nem kell az összes adatot egyszerre a memóriába tölteni.
+# results_panel - virtualizált eredménylista (csak a látható sorok készülnek el)
+import results_panel
+# palette_export: az eredmények exportja (JSON, CSV, GIMP, Adobe ASE...)
+import palette_export
+
+# A nehéz modulok csak az első használatkor töltődnek be (a függvényeken belül importálva),
+# így az ablak nem vár rájuk:
+#   PIL (Pillow)   - képek megnyitása, átméretezése; ImageTk: PIL képek a tkinter számára
+#   numpy          - a képpontok hatékony feldolgozása
+#   palette_engine - a grafikus felülettől független színelemző motor (klaszterezés, színkódok,
+#                    mentés TXT/HTML formátumba)
+#   palette_cache  - az elemzési eredmények gyorsítótára (ugyanarra a képre nem fut újra a klaszterezés)
+#   image_viewport - csempézett, csak a látható részt kirajzoló képmegjelenítő (nagyítás, mozgatás)
+# Az ablak megjelenése után egy háttérszál előre betölti őket (lásd prewarm), így az első kép
+# betöltése sem vár. A GUI a motor NumPy k-means-ét használja, a scikit-learn-t nem tölti be.
+PREWARM_MODULES = ("numpy", "PIL.Image", "PIL.ImageTk", "palette_engine", "palette_cache", "image_viewport")
 
 # os - operációs rendszerrel kapcsolatos műveletekhez (pl. fájl elérhetőségének ellenőrzése)
 import os
+# sys - a parancssori argumentumok eléréséhez
+import sys
+# threading, queue - az elemzés háttérszálon fut, az eredmény egy sorban jön vissza a fő szálra
+import threading
+import queue
+# importlib - a nehéz modulok előtöltéséhez a háttérben
+import importlib
+# copy - a színelemző beállításainak pillanatképe a háttérben futó elemzéshez
+import copy
+
+# A háttérszál üzeneteinek lekérdezési gyakorisága (ezredmásodperc)
+WORKER_POLL_MS = 50
+
+# Az elemzési gyorsítótár mérete a memóriában. Egy "Paletta generálása" színszámonként egy
+# bejegyzést tárol (2-32: 31 bejegyzés), így ez kb. 16 kép teljes tartományának és Top 10
+# eredményének elég; egy bejegyzés csak néhány tucat szín, a méret elhanyagolható.
+CACHE_ENTRIES = 512
+
+# A színválasztó mintaterületének választható méretei (N -> N x N képpont átlaga)
+PICK_SIZES = (1, 3, 5, 9)
+
+# A választható klaszterező algoritmusok és színterek (mint a palette_engine.ALGORITHMS és
+# COLOR_SPACES; itt a motor importja nélkül, hogy a menük az ablakkal együtt elkészülhessenek)
+ALGORITHMS = ("kmeans", "histogram")
+COLOR_SPACES = ("rgb", "lab", "oklab")
+
+# A kijelölés módjai a menüben, és a hozzájuk tartozó palette_engine.region_pixels paraméter
+# (None: a bal egérgomb színt választ)
+SELECTION_MODES = {"Nincs": None, "Téglalap": "box", "Lasszó": "polygon"}
+
+# Az elemzési szakaszok neve az állapotsorban
+STAGE_LABELS = palette_trace.STAGE_LABELS
+
+# Ha ez a környezeti változó egy fájlnevet tartalmaz, a feladatok szakaszonkénti mérése
+# ebbe a JSON trace fájlba (Chrome trace formátum) is kikerül
+TRACE_ENV = "DDCOLORS_TRACE"
 
 # Az alkalmazás fő osztálya, ami az egész program logikáját tartalmazza.
 class ImageColorApp:
@@ -43,28 +91,119 @@ class ImageColorApp:
         self.original_image = None
         self.current_image = None
         self.photo_image = None
+        # A látható terület kirajzolója (mipmap piramis és csempe-gyorsítótár)
+        self.viewport = None
         
         # Változók a kép nagyításához és mozgatásához
         self.zoom_level = 1.0
+        self.min_zoom = 0.1
         self.pan_x = 0
         self.pan_y = 0
         self.last_x = 0
         self.last_y = 0
 
+        # A kép egyszer, betöltéskor dekódolt RGB puffere ((magasság, szélesség, 3) uint8 tömb).
+        # A színválasztás, az elemzések és a poszterizálás mind ezt használják, így a kép
+        # módjától (palettás, RGBA, szürkeárnyalatos) függetlenül mindig RGB színt kapnak.
         self.pixel_data = None
+        # A kép nem átlátszó képpontjainak maszkja (None, ha nincs átlátszó képpont); az átlátszó
+        # képpontok kimaradnak az elemzésekből. Az RGB pufferből a motor nem látja az alfát, ezért
+        # ezt a maszkot a kijelöléssel együtt a GUI adja át (lásd analysis_region)
+        self.opaque_mask = None
+        # A kijelölés a kép koordinátáiban: ("box", (bal, felső, jobb, alsó)) vagy ("polygon",
+        # ((x, y), ...)); None esetén az egész kép számít. A húzás alatti pontok a selection_points-ban.
+        self.selection = None
+        self.selection_points = []
         self.current_image_path = ""
+        # A betöltött kép tartalmának hash-e, a gyorsítótár kulcsához
+        self.image_digest = None
+        # A csúszka teljes tartományára egyszerre kiszámolt paletták ({színszám: eredmény}),
+        # és hogy melyik képhez, algoritmushoz és színtérhez tartoznak
+        self.palette_range = {}
+        self.palette_range_key = None
         
         # Változók a felhasználó által gyűjtött színekhez
         self.custom_palette_colors = []
         self.picked_color_code = None
+
+        # Az eredménypanelen éppen látható eredmény (palette_engine.ResultList; a mentés és a
+        # poszterizálás is ezt használja), és hogy a poszterizált előnézet látszik-e a canvas-on
+        self.results = None
+        self.posterized = False
+
+        # A színelemző motor és a gyorsítótára; az első használatkor jönnek létre (lásd extractor)
+        self.analysis_cache = None
+        self._extractor = None
+        # Az előtöltés (prewarm) végét jelző esemény
+        self.prewarmed = threading.Event()
+        
+        # A háttérben futó elemzés állapota: a szál üzenetei egy sorban jönnek vissza,
+        # és csak a legutóbb indított feladat (job_id) eredménye jelenik meg
+        self.worker_queue = queue.Queue()
+        self.job_id = 0
+        self.job_message = ""
+        self.job_on_done = None
+        self.cancel_event = None
+        self.polling = False
+        # A futó feladat szakaszonkénti mérése, és az opcionális JSON trace fájl
+        self.job_trace = None
+        self.trace_path = os.environ.get(TRACE_ENV)
         
         # A felhasználói felület (UI) felépítésének elindítása
         self.setup_ui()
+        # Az ablak első megjelenése után indul az előtöltés
+        self.root.after_idle(self.on_window_shown)
+
+    # A színelemző motor, ami a klaszterezést végzi; az első használatkor jön létre a menükben
+    # beállított algoritmussal és színtérrel. A gyorsítótár miatt a "Top 10 szín" és a "Paletta
+    # generálása" gombok ismételt megnyomása nem illeszt újra. A NumPy k-means (backend="numpy")
+    # a minta hisztogramján fut, gyorsabb a MiniBatchKMeans-nél, és nem kell hozzá a scikit-learn.
+    @property
+    def extractor(self):
+        if self._extractor is None:
+            import palette_cache
+            import palette_engine
+            self.analysis_cache = palette_cache.AnalysisCache(max_entries=CACHE_ENTRIES)
+            self._extractor = palette_engine.PaletteExtractor(
+                n_colors=10, cache=self.analysis_cache, backend="numpy",
+                algorithm=self.algorithm_var.get(), color_space=self.color_space_var.get())
+        return self._extractor
+
+    # --- INDULÁS ---
+
+    # Az ablak első megjelenése: az indulás mérése az előtöltéssel folytatódik, ami egy
+    # háttérszálon betölti a nehéz modulokat
+    def on_window_shown(self):
+        STARTUP_TRACE.begin("prewarm")
+        threading.Thread(target=self.prewarm, daemon=True).start()
+        self.root.after(WORKER_POLL_MS, self.check_prewarm)
+
+    # A háttérszálon fut; egy sikertelen import (pl. hiányzó csomag) csak az első használatkor jelez
+    def prewarm(self):
+        try:
+            for name in PREWARM_MODULES:
+                importlib.import_module(name)
+        except ImportError:
+            pass
+        finally:
+            self.prewarmed.set()
+
+    # Az előtöltés végének figyelése a fő szálon; a végén az indulás összesítése az állapotsorba
+    # kerül (ha közben nem indult feladat, aminek az állapotát felülírná)
+    def check_prewarm(self):
+        if not self.prewarmed.is_set():
+            self.root.after(WORKER_POLL_MS, self.check_prewarm)
+            return
+        self.finish_trace(STARTUP_TRACE, "Indulás", show=self.cancel_event is None)
 
     # --- UI RÉSZ ---
     
     # A felhasználói felület elemeinek elhelyezése és beállítása
     def setup_ui(self):
+        # Állapotsor az ablak alján (pl. az elemzés haladásának kijelzésére)
+        self.status_label = tk.Label(self.root, text="", anchor="w", relief=tk.SUNKEN, bd=1)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
         # Fő keret létrehozása, ami a bal oldali panelt és a képnézegetőt tartalmazza
         main_frame = tk.Frame(self.root)
         main_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
@@ -90,6 +229,21 @@ class ImageColorApp:
         self.lbl_color_codes.pack(side=tk.LEFT, padx=5)
         self.btn_copy_hex = tk.Button(self.picked_color_code_frame, text="Másolás", command=self.copy_hex_picker)
         self.btn_copy_hex.pack(side=tk.RIGHT, padx=5)
+        # A mintaterület mérete: zajos fotókon egy képpont helyett egy kis környezet átlaga
+        self.pick_size_var = tk.StringVar(value=f"{PICK_SIZES[0]}x{PICK_SIZES[0]}")
+        pick_size_menu = tk.OptionMenu(self.picked_color_code_frame, self.pick_size_var,
+                                       *[f"{n}x{n}" for n in PICK_SIZES])
+        pick_size_menu.pack(side=tk.RIGHT)
+
+        # Kijelölés szekció: téglalap vagy lasszó módban a bal egérgombbal húzva a kép egy része
+        # jelölhető ki, és az elemzések csak a kijelölt képpontokat veszik figyelembe
+        selection_frame = tk.LabelFrame(left_panel, text="Kijelölés")
+        selection_frame.pack(fill=tk.X, pady=5)
+        self.selection_mode_var = tk.StringVar(value="Nincs")
+        selection_menu = tk.OptionMenu(selection_frame, self.selection_mode_var, *SELECTION_MODES)
+        selection_menu.pack(side=tk.LEFT, pady=5, padx=5, expand=True, fill=tk.X)
+        btn_clear_selection = tk.Button(selection_frame, text="Kijelölés törlése", command=self.clear_selection)
+        btn_clear_selection.pack(side=tk.RIGHT, pady=5, padx=5)
         
         # Saját paletta szekció
         custom_palette_frame = tk.LabelFrame(left_panel, text="Saját paletta")
@@ -108,31 +262,41 @@ class ImageColorApp:
         # Generált színpaletta szekció
         palette_frame = tk.LabelFrame(left_panel, text="Színpaletta")
         palette_frame.pack(fill=tk.X, pady=5)
-        self.palette_scale = tk.Scale(palette_frame, from_=2, to=32, orient=tk.HORIZONTAL, label="Színek száma")
+        # A csúszka mozgatása azonnal megjeleníti a palettát, ha a tartomány már ki van számolva
+        self.palette_scale = tk.Scale(palette_frame, from_=2, to=32, orient=tk.HORIZONTAL, label="Színek száma",
+                                      command=self.on_palette_scale)
         self.palette_scale.set(8) # Alapértelmezett érték 8
         self.palette_scale.pack(fill=tk.X, padx=5)
+
+        # Klaszterező algoritmus kiválasztása (k-means a képpontokon vagy hisztogram alapú)
+        self.algorithm_var = tk.StringVar(value=ALGORITHMS[0])
+        algorithm_menu = tk.OptionMenu(palette_frame, self.algorithm_var, *ALGORITHMS,
+                                       command=self.set_algorithm)
+        algorithm_menu.pack(fill=tk.X, padx=5)
+
+        # A klaszterezés színtere: nyers RGB vagy az észlelésnek megfelelő CIELAB / OKLab
+        self.color_space_var = tk.StringVar(value=COLOR_SPACES[0])
+        color_space_menu = tk.OptionMenu(palette_frame, self.color_space_var, *COLOR_SPACES,
+                                         command=self.set_color_space)
+        color_space_menu.pack(fill=tk.X, padx=5)
         
         btn_generate_palette = tk.Button(palette_frame, text="Paletta generálása", command=self.generate_palette)
         btn_generate_palette.pack(side=tk.LEFT, pady=5, padx=5, expand=True, fill=tk.X)
         
         btn_show_top_colors = tk.Button(palette_frame, text="Top 10 szín", command=self.analyze_colors)
         btn_show_top_colors.pack(side=tk.RIGHT, pady=5, padx=5, expand=True, fill=tk.X)
+
+        # A kép képpontjainak a látható palettára cserélése (előnézet és lefedettség)
+        self.btn_posterize = tk.Button(left_panel, text="Poszterizálás", command=self.toggle_posterize)
+        self.btn_posterize.pack(fill=tk.X, pady=5)
         
         # Eredmények konténere (leggyakoribb színek, saját paletta)
         result_container = tk.LabelFrame(left_panel, text="Eredmények")
         result_container.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # Canvas és görgetősáv az eredményekhez, ha azok nem férnek el
-        self.result_canvas = tk.Canvas(result_container)
-        self.result_frame = tk.Frame(self.result_canvas)
-        self.scrollbar = tk.Scrollbar(result_container, orient="vertical", command=self.result_canvas.yview)
-        self.result_canvas.configure(yscrollcommand=self.scrollbar.set)
-        
-        self.scrollbar.pack(side="right", fill="y")
-        self.result_canvas.pack(side="left", fill="both", expand=True)
-        self.result_canvas.create_window((0, 0), window=self.result_frame, anchor="nw")
-        # Ez a sor dinamikusan frissíti a görgetősávot, ha az eredmények száma megváltozik
-        self.result_frame.bind("<Configure>", lambda event, canvas=self.result_canvas: canvas.configure(scrollregion=canvas.bbox("all")))
+        # Görgethető eredménylista; több száz színnél is csak a látható sorok készülnek el
+        self.results_panel = results_panel.ResultsPanel(result_container, on_copy=self.copy_to_clipboard,
+                                                        on_delete=self.remove_from_custom_palette)
         
         # Mentés gombok
         save_button_frame = tk.Frame(left_panel)
@@ -140,23 +304,126 @@ class ImageColorApp:
         btn_save_txt = tk.Button(save_button_frame, text="Mentés TXT-be", command=lambda: self.save_results("txt"))
         btn_save_txt.pack(side=tk.LEFT, expand=True, padx=5)
         btn_save_html = tk.Button(save_button_frame, text="Mentés HTML-be", command=lambda: self.save_results("html"))
-        btn_save_html.pack(side=tk.RIGHT, expand=True, padx=5)
+        btn_save_html.pack(side=tk.LEFT, expand=True, padx=5)
+        btn_export = tk.Button(save_button_frame, text="Exportálás...", command=self.export_results)
+        btn_export.pack(side=tk.RIGHT, expand=True, padx=5)
         
         # Fő canvas a kép megjelenítéséhez
         self.canvas = tk.Canvas(main_frame, width=900, height=780, bg="lightgrey",
                                  borderwidth=2, relief="sunken")
         self.canvas.pack(side=tk.RIGHT, padx=10, pady=10, fill=tk.BOTH, expand=True)
         
-        # Eseménykezelők a nagyításhoz (görgetőkerék), mozgatáshoz (jobb klikk) és színválasztáshoz (bal klikk)
+        # Eseménykezelők a nagyításhoz (görgetőkerék), mozgatáshoz (jobb klikk), valamint a
+        # színválasztáshoz és a kijelöléshez (bal klikk, illetve húzás)
         self.canvas.bind("<MouseWheel>", self.zoom)
         self.canvas.bind("<ButtonPress-3>", self.pan_start)
         self.canvas.bind("<B3-Motion>", self.pan_move)
-        self.canvas.bind("<Button-1>", self.get_pixel_color)
+        self.canvas.bind("<Button-1>", self.on_left_press)
+        self.canvas.bind("<B1-Motion>", self.on_left_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_left_release)
+        # Az ablak átméretezésekor a látható terület újrarajzolása
+        self.canvas.bind("<Configure>", lambda event: self.update_canvas())
         
+    # Állapotüzenet (pl. "Elemzés: klaszterezés (40%)") kiírása az ablak alján
     def show_status(self, message):
-        # Ez a funkció jelenleg nem csinál semmit, de egy lehetséges
-        # hely a jövőbeli állapotüzenetek (pl. "Feldolgozás...") kiírására.
-        pass
+        self.status_label.config(text=message)
+
+    # --- HÁTTÉRBEN FUTÓ ELEMZÉS ---
+
+    # Egy elemzés indítása háttérszálon, hogy az ablak ne fagyjon le. A work(progress) a háttérben
+    # fut, az eredményét az on_done(result) kapja meg a fő szálon (root.after lekérdezéssel).
+    # Új feladat indítása megszakítja az előzőt: az a következő haladásjelzésnél leáll,
+    # és az eredménye már nem jelenik meg.
+    # A feladat szakaszai (és az on_done kirajzolása) mérve vannak; a trace paraméterrel egy
+    # már elkezdett mérés folytatható (pl. a betöltés dekódolása után az elemzés).
+    def run_in_background(self, message, work, on_done, trace=None):
+        import palette_engine
+
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+        self.job_id += 1
+        job_id = self.job_id
+        cancel_event = threading.Event()
+        self.cancel_event = cancel_event
+        self.job_message = message
+        self.job_on_done = on_done
+        trace = trace or palette_trace.Trace(message)
+        self.job_trace = trace
+
+        # A motor ezen keresztül jelzi a haladást; a megszakított feladatot itt állítjuk le
+        def progress(stage, fraction):
+            if cancel_event.is_set():
+                raise palette_engine.AnalysisCancelled()
+            trace.progress(stage, fraction)
+            self.worker_queue.put((job_id, "progress", (stage, fraction)))
+
+        def run():
+            try:
+                result = work(progress)
+                trace.end()
+                self.worker_queue.put((job_id, "done", result))
+            except palette_engine.AnalysisCancelled:
+                pass
+            except Exception as e:
+                trace.end()
+                self.worker_queue.put((job_id, "error", e))
+
+        threading.Thread(target=run, daemon=True).start()
+        self.show_status(f"{message}...")
+        if not self.polling:
+            self.polling = True
+            self.root.after(WORKER_POLL_MS, self.poll_worker)
+
+    # A háttérszál üzeneteinek feldolgozása a fő szálon. Az elavult (felülírt) feladatok
+    # üzeneteit eldobja; amíg fut feladat, újraütemezi magát.
+    def poll_worker(self):
+        while True:
+            try:
+                job_id, kind, payload = self.worker_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self.job_id:
+                continue
+            if kind == "progress":
+                stage, fraction = payload
+                self.show_status(f"{self.job_message}: {STAGE_LABELS.get(stage, stage)} ({fraction:.0%})")
+            elif kind == "done":
+                self.cancel_event = None
+                # Az eredmény kirajzolása (pl. az eredménypanel újraépítése) is a mérés része
+                with self.job_trace.stage("render"):
+                    self.job_on_done(payload)
+                self.finish_trace(self.job_trace, f"{self.job_message}: kész")
+            else:
+                self.cancel_event = None
+                self.show_status(f"{self.job_message}: hiba")
+                messagebox.showerror("Hiba", f"Az elemzés nem sikerült: {payload}")
+
+        if self.cancel_event is not None:
+            self.root.after(WORKER_POLL_MS, self.poll_worker)
+        else:
+            self.polling = False
+
+    # Egy mérés lezárása: az összesítés az állapotsorba kerül, a részletek (ha be van állítva)
+    # a JSON trace fájlba. show=False esetén az állapotsor nem változik.
+    def finish_trace(self, trace, message, show=True):
+        trace.finish()
+        if show:
+            self.show_status(f"{message} ({trace.summary_text()})")
+        if self.trace_path:
+            try:
+                palette_trace.save_trace(self.trace_path, [trace])
+            except OSError as e:
+                print(f"A trace fájl nem írható: {e}", file=sys.stderr)
+
+    # A kép hash-e a háttérben (ha még nincs meg), a betöltéskor elkészült RGB pufferből
+    @staticmethod
+    def prepare_digest(array, digest, progress):
+        import palette_engine
+
+        if digest is None:
+            progress("hash", 0.0)
+            digest = palette_engine.image_digest(array)
+        return digest
         
     # --- KÉP KEZELŐ FÜGGVÉNYEK ---
     
@@ -167,10 +434,28 @@ class ImageColorApp:
         )
         if file_path:
             try:
-                self.original_image = Image.open(file_path)
+                from PIL import Image
+                import palette_engine
+
+                # A betöltés szakaszai és az azt követő elemzés egy mérésbe kerülnek
+                trace = palette_trace.Trace("Betöltés és elemzés")
+                with trace.stage("decode"):
+                    self.original_image = Image.open(file_path)
+                    # A kép dekódolása még itt, a fő szálon, hogy a háttérszál és a megjelenítés
+                    # ne egyszerre töltse be
+                    self.original_image.load()
+                with trace.stage("convert"):
+                    # Az RGB puffer egyszer készül el; az elemzések már nem konvertálják újra a képet
+                    self.pixel_data = palette_engine.to_rgb_array(self.original_image)
+                    self.opaque_mask = palette_engine.opaque_mask(self.original_image)
                 self.current_image_path = file_path
-                self.analyze_colors() # Automatikusan elemzi a top 10 színt
-                self.reset_view() # Visszaállítja a nagyítást és a pozíciót
+                self.image_digest = None
+                self.palette_range_key = None
+                self.selection = None
+                self.selection_points = []
+                with trace.stage("render"):
+                    self.reset_view() # Visszaállítja a nagyítást és a pozíciót
+                self.analyze_colors(trace) # Automatikusan elemzi a top 10 színt (a háttérben)
             except Exception as e:
                 messagebox.showerror("Hiba", f"Nem sikerült betölteni a képet: {e}")
 
@@ -178,111 +463,115 @@ class ImageColorApp:
     def reset_view(self):
         img_width, img_height = self.original_image.size
         max_size = 900
-        # A kép átméretezése, ha túl nagy, hogy elférjen a canvas-on
-        if img_width > max_size or img_height > max_size:
-            self.current_image = self.original_image.copy()
-            self.current_image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-        else:
-            self.current_image = self.original_image.copy()
-        
-        # A kép konvertálása tkinter-kompatibilis formátumra
-        self.photo_image = ImageTk.PhotoImage(self.current_image)
-        self.canvas.delete("all")
-        # Kép elhelyezése a canvas közepén
-        self.canvas.create_image(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2, 
-                                 anchor=tk.CENTER, image=self.photo_image)
-        
-        # Nagyítási és mozgatási paraméterek alaphelyzetbe állítása
-        self.zoom_level = 1.0
+        # A nagyítás úgy áll be, hogy a kép elférjen a canvas-on. Ugyanez a nagyítás
+        # érvényes a színválasztásnál is, így a kattintás a látott képpontot választja.
+        self.zoom_level = min(1.0, max_size / max(img_width, img_height))
+        self.min_zoom = min(0.1, self.zoom_level)
         self.pan_x = 0
         self.pan_y = 0
-        
-        # A görgetősáv határainak beállítása (bár a nagyítás/mozgatás miatt ez itt nem teljesen kihasznált)
-        self.canvas.config(scrollregion=(0, 0, self.current_image.width, self.current_image.height))
+        self.posterized = False
+        self.btn_posterize.config(text="Poszterizálás")
+
+        # Új kirajzoló az új képhez (az előző kép piramisa és csempéi felszabadulnak)
+        import image_viewport
+        self.viewport = image_viewport.ViewportRenderer(self.viewport_image())
+        self.update_canvas()
+
+    # A megjelenítendő kép a közös RGB pufferből, így a canvas ugyanazokat a színeket mutatja, mint
+    # amiket a színválasztó és az elemzés lát (pl. 16 bites képeknél is); átlátszó képnél az
+    # eredeti alfa csatornával
+    def viewport_image(self):
+        from PIL import Image
+
+        image = Image.fromarray(self.pixel_data)
+        original = self.original_image
+        if "transparency" in original.info or original.mode in ("RGBA", "LA", "PA"):
+            if original.mode not in ("RGBA", "LA", "PA"):
+                original = original.convert("RGBA")
+            image.putalpha(original.getchannel("A"))
+        return image
 
     # --- SZÍN ELEMZŐ FÜGGVÉNYEK ---
     
-    # A 10 leggyakoribb szín elemzése MiniBatchKMeans-szel
-    def analyze_colors(self):
+    # A 10 leggyakoribb szín elemzése MiniBatchKMeans-szel. A trace egy már elkezdett mérés
+    # (a betöltésé), amit az elemzés folytat.
+    def analyze_colors(self, trace=None):
         if not self.original_image:
             return
         
-        # A kép konvertálása RGB módba, ha szükséges
-        if self.original_image.mode != "RGB":
-            rgb_image = self.original_image.convert("RGB")
-        else:
-            rgb_image = self.original_image
-
-        # A képpontokból egy NumPy tömböt hoz létre, ahol minden sor egy képpontot (R,G,B) jelöl
-        pixels = np.array(rgb_image).reshape(-1, 3)
-        
-        # MiniBatchKMeans modell inicializálása és illesztése 10 klaszterre
-        kmeans = MiniBatchKMeans(n_clusters=10, random_state=0, n_init=3)
-        kmeans.fit(pixels)
-        # A klaszterek középpontjai a leggyakoribb színek, egész számokká alakítva
-        top_10_colors = kmeans.cluster_centers_.astype(int)
-        
-        # Az eredmények megjelenítése a felületen
-        self.display_results("A 10 leggyakoribb szín:", top_10_colors)
-
-    # Az elemzési eredmények (színek) megjelenítése a bal oldali panelen
-    def display_results(self, title, colors):
-        # Előző eredmények törlése a framből
-        for widget in self.result_frame.winfo_children():
-            widget.destroy()
-
-        # Cím megjelenítése
-        title_label = tk.Label(self.result_frame, text=title, anchor="w", font=("Arial", 10, "bold"))
-        title_label.pack(fill=tk.X, padx=5, pady=(5,0))
-        
-        # Minden színhez létrehoz egy külön sávot
-        for rgb_color in colors:
-            rgb_code = tuple(map(int, rgb_color))
-            hex_code = f"#{rgb_color[0]:02x}{rgb_color[1]:02x}{rgb_color[2]:02x}"
-            
-            color_row = tk.Frame(self.result_frame)
-            color_row.pack(fill=tk.X, padx=5, pady=2)
-            
-            # Színes négyzet megjelenítése
-            color_box = tk.Label(color_row, bg=hex_code, width=4, height=1)
-            color_box.pack(side=tk.LEFT, fill=tk.Y)
-            
-            # RGB és HEX kódok szövegként
-            color_labels = tk.Label(color_row, text=f"RGB: {rgb_code}\nHEX: {hex_code}", anchor="w", justify=tk.LEFT)
-            color_labels.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-            
-            # Másolás gomb a HEX kódhoz
-            btn_copy = tk.Button(color_row, text="Másolás", command=lambda hex_val=hex_code: self.copy_to_clipboard(hex_val))
-            btn_copy.pack(side=tk.RIGHT)
-            
-            # Ha a saját palettát jeleníti meg, hozzáad egy törlés gombot
-            if title.startswith("Saját paletta"):
-                btn_delete = tk.Button(color_row, text="x", command=lambda color=rgb_color: self.remove_from_custom_palette(color))
-                btn_delete.pack(side=tk.RIGHT, padx=(5, 0))
+        # A motor elvégzi az RGB konverziót és az illesztést egy képpontmintán, a háttérben.
+        # A kijelzéshez csak a színek kellenek, ezért az összes képpont hozzárendelése elmarad.
+        # Az illesztés ugyanaz, mint a "Paletta generálása" tartományáé: a csúszka aljától 10-ig
+        # tartó lánc (a 10 színű paletta csak a kisebb színszámoktól függ), így a Top 10 és a
+        # csúszka 10-es állása ugyanazt a palettát mutatja.
+        k_values = range(int(self.palette_scale.cget("from")), 11)
+        array, digest, extractor = self.pixel_data, self.image_digest, copy.copy(self.extractor)
+        region = self.analysis_region()
+        title = "A 10 leggyakoribb szín (kijelölés):" if self.selection else "A 10 leggyakoribb szín:"
+
+        def work(progress):
+            if region is not None:
+                return digest, extractor.extract_range(self.region_pixels(array, region, progress), k_values,
+                                                       with_counts=False, progress=progress)
+            image_digest = self.prepare_digest(array, digest, progress)
+            return image_digest, extractor.extract_range(array, k_values, with_counts=False,
+                                                         digest=image_digest, progress=progress)
+
+        def on_done(payload):
+            self.image_digest, results = payload
+            # Az eredmények megjelenítése a felületen
+            self.display_results(title, results[10].colors)
+
+        self.run_in_background("Elemzés", work, on_done, trace)
+
+    # Az elemzendő képpontok a palette_engine.region_pixels paramétereiként: a kijelölés és az
+    # átlátszó képpontok maszkja. None, ha az egész kép számít (ekkor a kép hash-e a gyorsítótár
+    # kulcsa, és a teljes RGB puffer kerül a motorhoz).
+    def analysis_region(self):
+        if self.selection is None and self.opaque_mask is None:
+            return None
+        region = {"mask": self.opaque_mask}
+        if self.selection is not None:
+            kind, data = self.selection
+            region[kind] = data
+        return region
+
+    # A háttérben: a kijelölt képpontok kivágása a pufferből. Csak a kijelölés befoglaló téglalapja
+    # kerül feldolgozásra, így egy nagy kép kis részlete is gyorsan elemezhető.
+    @staticmethod
+    def region_pixels(array, region, progress):
+        import palette_engine
+
+        progress("region", 0.0)
+        return palette_engine.region_pixels(array, **region)
+
+    # Az elemzési eredmények (színek) megjelenítése a bal oldali panelen.
+    # A shares (színenkénti arány, 0.0 - 1.0) megadásakor a lefedettség is megjelenik;
+    # removable esetén a színek mellett törlés gomb is van (saját paletta).
+    # Az adatok egy ResultList modellbe kerülnek, a panel csak a látható sorokat rajzolja ki.
+    def display_results(self, title, colors, shares=None, removable=False):
+        import palette_engine
+
+        self.results = palette_engine.ResultList(title, colors, shares, removable)
+        self.results_panel.show(self.results)
 
     # Egy képpont színének lekérdezése kattintásra
     def get_pixel_color(self, event):
+        import palette_engine
+
         if not self.original_image:
             return
         
         # A kattintás pozíciójának átváltása a canvas koordinátáiból az eredeti kép koordinátáira
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        # Korrigált pozíció a nagyítás és mozgatás miatt
-        zoomed_x = event.x - (canvas_width / 2) - self.pan_x
-        zoomed_y = event.y - (canvas_height / 2) - self.pan_y
-        
-        # Visszaállítás az eredeti képméretre
-        original_x = int(zoomed_x / self.zoom_level + self.original_image.width / 2)
-        original_y = int(zoomed_y / self.zoom_level + self.original_image.height / 2)
+        original_x, original_y = (int(v) for v in self.canvas_to_image(event.x, event.y))
         
         # Ellenőrzi, hogy a kattintás a kép határain belül van-e
         if 0 <= original_x < self.original_image.width and 0 <= original_y < self.original_image.height:
-            # Lekéri a képpont színét
-            rgb_color = self.original_image.getpixel((original_x, original_y))
+            # Lekéri a képpont (vagy a mintaterület átlagának) színét a pufferből
+            pick_size = int(self.pick_size_var.get().split("x")[0])
+            rgb_color = palette_engine.pick_color(self.pixel_data, original_x, original_y, pick_size)
             # Konvertálja a színt HEX formátumra
-            hex_color = f"#{rgb_color[0]:02x}{rgb_color[1]:02x}{rgb_color[2]:02x}"
+            hex_color = palette_engine.rgb_to_hex(rgb_color)
             
             # Frissíti a színválasztó panelen a színt és a kódokat
             self.lbl_picked_color.config(bg=hex_color)
@@ -295,8 +584,12 @@ class ImageColorApp:
     def add_to_custom_palette(self):
         if self.picked_color_code:
             rgb_color, hex_code = self.picked_color_code
-            # Ellenőrzi, hogy a szín még nem szerepel a palettán
-            if hex_code not in [c[1] for c in self.custom_palette_colors]:
+            # Ellenőrzi, hogy a szín (vagy egy szemre azonos árnyalata a választott színtérben)
+            # még nem szerepel a palettán
+            import palette_engine
+
+            if not palette_engine.is_near_duplicate(rgb_color, [c[0] for c in self.custom_palette_colors],
+                                                    self.color_space_var.get()):
                 self.custom_palette_colors.append((rgb_color, hex_code))
                 self.show_custom_palette() # Frissíti a kijelzőt
             else:
@@ -307,7 +600,7 @@ class ImageColorApp:
     # Szín eltávolítása a saját palettáról
     def remove_from_custom_palette(self, color_to_remove):
         # List comprehension segítségével szűri a listát
-        self.custom_palette_colors = [c for c in self.custom_palette_colors if not np.array_equal(c[0], color_to_remove)]
+        self.custom_palette_colors = [c for c in self.custom_palette_colors if tuple(c[0]) != tuple(color_to_remove)]
         self.show_custom_palette()
 
     # Saját paletta megjelenítése
@@ -318,12 +611,12 @@ class ImageColorApp:
         
         # Csak az RGB kódokat adja át a display_results függvénynek
         colors = [c[0] for c in self.custom_palette_colors]
-        self.display_results("Saját paletta:", colors)
+        self.display_results("Saját paletta:", colors, removable=True)
 
     # Saját paletta tartalmának törlése
     def clear_custom_palette(self):
         self.custom_palette_colors = []
-        self.display_results("Saját paletta:", [])
+        self.display_results("Saját paletta:", [], removable=True)
     
     # Színválasztó HEX kódjának másolása
     def copy_hex_picker(self):
@@ -337,23 +630,110 @@ class ImageColorApp:
         self.root.clipboard_clear()
         self.root.clipboard_append(text)
 
+    # A klaszterező algoritmus átállítása a legördülő menüből
+    # (amíg a motor nem jött létre, elég a menü értéke: a motor abból indul)
+    def set_algorithm(self, algorithm):
+        if self._extractor is not None:
+            self._extractor.algorithm = algorithm
+
+    # A klaszterezés színterének átállítása a legördülő menüből
+    def set_color_space(self, color_space):
+        if self._extractor is not None:
+            self._extractor.color_space = color_space
+
     # Színpaletta generálása a csúszka értékének megfelelően
     def generate_palette(self):
         if not self.original_image:
             messagebox.showinfo("Információ", "Kérlek, tölts be egy képet a paletta generálásához.")
             return
 
-        n_colors = self.palette_scale.get()
-        
-        # Hasonló logika, mint az analyze_colors() függvényben, de a klaszterek száma most a csúszka értéke
-        pixels = np.array(self.original_image).reshape(-1, 3)
-        
-        kmeans = MiniBatchKMeans(n_clusters=n_colors, random_state=0, n_init=3)
-        kmeans.fit(pixels)
-        
-        palette_colors = kmeans.cluster_centers_.astype(int)
+        # Ha a tartomány már ki van számolva, azonnal megjeleníti
+        if self.palette_range_key == self.current_range_key():
+            self.on_palette_scale(self.palette_scale.get())
+            return
         
-        self.display_results(f"Generált színpaletta ({n_colors} szín):", palette_colors)
+        # Az első generáláskor a csúszka teljes tartományára (2-32) kiszámolja a palettákat
+        # egyetlen menetben (a háttérben), így a csúszka későbbi mozgatása már azonnali
+        k_values = range(int(self.palette_scale.cget("from")), int(self.palette_scale.cget("to")) + 1)
+        array, digest, extractor = self.pixel_data, self.image_digest, copy.copy(self.extractor)
+        region, selection = self.analysis_region(), self.selection
+
+        def work(progress):
+            if region is not None:
+                return digest, extractor.extract_range(self.region_pixels(array, region, progress), k_values,
+                                                       with_counts=False, progress=progress)
+            image_digest = self.prepare_digest(array, digest, progress)
+            return image_digest, extractor.extract_range(array, k_values, with_counts=False,
+                                                         digest=image_digest, progress=progress)
+
+        def on_done(payload):
+            self.image_digest, self.palette_range = payload
+            self.palette_range_key = (self.image_digest, selection, extractor.algorithm, extractor.color_space)
+            self.on_palette_scale(self.palette_scale.get())
+
+        self.run_in_background("Paletta generálása", work, on_done)
+
+    # A csúszka mozgatásakor a már kiszámolt tartományból azonnal megjeleníti a palettát
+    # (Kép nélkül a kulcs sem számolható: a current_range_key az extractort, vagyis a nehéz
+    # modulokat húzná be már az indításkor, amikor a csúszka első értékét beállítjuk.)
+    def on_palette_scale(self, value):
+        if self.original_image and self.palette_range_key == self.current_range_key():
+            n_colors = int(value)
+            label = f"{n_colors} szín, kijelölés" if self.selection else f"{n_colors} szín"
+            self.display_results(f"Generált színpaletta ({label}):", self.palette_range[n_colors].colors)
+
+    # A kiszámolt palettatartomány ennyiben érvényes: a kép, a kijelölés, az algoritmus és a színtér
+    def current_range_key(self):
+        return (self.image_digest, self.selection, self.extractor.algorithm, self.extractor.color_space)
+
+    # A kép poszterizálása a panelen látható palettával (generált paletta, top 10 szín vagy saját
+    # paletta): minden képpont a legközelebbi palettaszínt kapja, a canvas az így kapott képet
+    # mutatja, a panel pedig a színek pontos lefedettségét. Újbóli megnyomásra az eredeti kép
+    # jelenik meg.
+    def toggle_posterize(self):
+        import image_viewport
+        import palette_engine
+
+        if not self.original_image:
+            messagebox.showinfo("Információ", "Kérlek, tölts be egy képet a poszterizáláshoz.")
+            return
+        if self.posterized:
+            self.posterized = False
+            self.btn_posterize.config(text="Poszterizálás")
+            self.viewport = image_viewport.ViewportRenderer(self.viewport_image())
+            self.update_canvas()
+            return
+        if not self.results:
+            messagebox.showinfo("Információ", "Nincs megjelenített paletta. Generálj vagy válassz színeket!")
+            return
+
+        # A hozzárendelés darabonként fut a háttérben (korlátos ideiglenes memória),
+        # így 20+ MP-es képeknél sem fagy le az ablak
+        array, digest = self.pixel_data, self.image_digest
+        results = self.results
+        color_space = self.extractor.color_space
+        region = self.analysis_region()
+
+        def work(progress):
+            image_digest = self.prepare_digest(array, digest, progress)
+            mapper = palette_engine.PaletteMapper(results.colors, color_space=color_space)
+            posterized_image, coverage = mapper.posterize(array, progress=progress)
+            if region is not None:
+                # A kép egésze poszterizálódik, de a lefedettség ugyanazokra a képpontokra
+                # számít, mint az elemzés: a kijelölésre, az átlátszó képpontok nélkül
+                coverage = mapper.coverage(self.region_pixels(array, region, progress), progress=progress)
+            return image_digest, posterized_image, coverage
+
+        def on_done(payload):
+            self.image_digest, posterized_image, coverage = payload
+            self.posterized = True
+            self.btn_posterize.config(text="Eredeti kép")
+            # Az új kirajzoló a nagyítást és a pozíciót változatlanul hagyja
+            self.viewport = image_viewport.ViewportRenderer(posterized_image)
+            self.update_canvas()
+            self.display_results(results.title, results.colors, coverage.shares(), results.removable)
+
+        self.run_in_background("Poszterizálás", work, on_done)
 
     # --- MENTÉS KEZELŐ FÜGGVÉNYEK ---
     
@@ -372,108 +752,73 @@ class ImageColorApp:
         
         if file_path:
             try:
-                if file_format == "html":
-                    # HTML mentéshez külön kell kinyerni a színeket
-                    self.save_as_html(file_path, self.get_colors_from_results())
-                else:
-                    self.save_as_txt(file_path, results_text)
+                trace = palette_trace.Trace("Mentés")
+                with trace.stage("export", format=file_format):
+                    if file_format == "html":
+                        # HTML mentéshez külön kell kinyerni a színeket
+                        self.save_as_html(file_path, self.get_colors_from_results())
+                    else:
+                        self.save_as_txt(file_path, results_text)
+                self.finish_trace(trace, "Mentés: kész")
 
                 messagebox.showinfo("Siker", f"Eredmények sikeresen elmentve {file_path}-ként!")
             except Exception as e:
                 messagebox.showerror("Hiba", f"Nem sikerült a mentés: {e}")
 
-    # A menteni kívánt színek listájának kinyerése
+    # Az eredmények exportja palettaformátumba (JSON, NDJSON, CSV, GIMP, Adobe ASE, HTML);
+    # a formátum a választott fájl kiterjesztéséből jön
+    def export_results(self):
+        if not self.results or not len(self.results):
+            messagebox.showinfo("Információ", "Nincsenek eredmények a mentéshez.")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[
+                ("JSON", "*.json"),
+                ("NDJSON", "*.ndjson"),
+                ("CSV", "*.csv"),
+                ("GIMP paletta", "*.gpl"),
+                ("Adobe Swatch Exchange", "*.ase"),
+                ("HTML kontaktlap", "*.html"),
+            ]
+        )
+        if not file_path:
+            return
+
+        file_format = palette_export.format_for_path(file_path) or "json"
+        try:
+            trace = palette_trace.Trace("Exportálás")
+            with trace.stage("export", format=file_format):
+                with palette_export.open_writer(file_path, file_format) as writer:
+                    writer.write(palette_export.result_list_record(self.results))
+            self.finish_trace(trace, "Exportálás: kész")
+
+            messagebox.showinfo("Siker", f"Eredmények sikeresen elmentve {file_path}-ként!")
+        except Exception as e:
+            messagebox.showerror("Hiba", f"Nem sikerült a mentés: {e}")
+
+    # A menteni kívánt színek listája ({'rgb': ..., 'hex': ...} szótárak) a megjelenített eredményből
     def get_colors_from_results(self):
-        colors_to_save = []
-        # Ellenőrzi, hogy van-e valami a result_frame-ben
-        if not self.result_frame.winfo_children() or len(self.result_frame.winfo_children()) < 2:
-            return colors_to_save
-
-        title_label = self.result_frame.winfo_children()[0]
-        # Ha a saját palettát jeleníti meg, a saját listából dolgozik
-        if title_label.cget("text").startswith("Saját paletta"):
-            colors_to_save = [{'rgb': c[0], 'hex': c[1]} for c in self.custom_palette_colors]
-        else:
-            # Különben a jelenleg kijelzett widgetekből olvassa ki az adatokat
-            for widget in self.result_frame.winfo_children()[1:]:
-                if isinstance(widget, tk.Frame):
-                    labels = widget.winfo_children()
-                    if len(labels) >= 2:
-                        rgb_text = labels[1].cget("text").split("RGB: ")[-1].split(")")[0]
-                        hex_text = labels[1].cget("text").split("HEX: ")[-1]
-                        
-                        rgb = tuple(map(int, rgb_text.replace('(', '').strip().split(',')))
-                        hex_code = hex_text.strip()
-                        colors_to_save.append({'rgb': rgb, 'hex': hex_code})
-        return colors_to_save
-
-    # A menteni kívánt szöveg kinyerése
+        if not self.results:
+            return []
+        return self.results.color_dicts()
+
+    # A menteni kívánt szöveg a megjelenített eredményből
     def get_results_text_to_save(self):
-        if not self.result_frame.winfo_children() or len(self.result_frame.winfo_children()) < 2:
+        if not self.results:
             return ""
-        
-        title_label = self.result_frame.winfo_children()[0]
-        if title_label.cget("text").startswith("Saját paletta"):
-            return "Saját paletta:\n" + "\n".join([f"RGB: {c[0]}, HEX: {c[1]}" for c in self.custom_palette_colors])
-        else:
-            text_lines = []
-            for widget in self.result_frame.winfo_children()[1:]:
-                if isinstance(widget, tk.Frame):
-                    labels = widget.winfo_children()
-                    if len(labels) >= 2:
-                        text_lines.append(labels[1].cget("text"))
-            return title_label.cget("text") + "\n" + "\n".join(text_lines)
+        return self.results.to_text()
 
     # Eredmények mentése sima szöveges fájlként
     def save_as_txt(self, file_path, text):
-        with open(file_path, "w") as f:
-            f.write(text)
+        import palette_engine
+        palette_engine.save_as_txt(file_path, text)
 
     # Eredmények mentése HTML fájlként stílusos megjelenítéssel
     def save_as_html(self, file_path, colors):
-        html_content = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-        <title>Színpaletta</title>
-        <style>
-        body { font-family: sans-serif; padding: 20px; }
-        h1 { color: #333; }
-        .color-palette { display: flex; flex-wrap: wrap; gap: 20px; }
-        .color-box {
-            width: 150px;
-            height: 150px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
-            text-align: center;
-            padding: 10px;
-        }
-        .color-code {
-            margin-top: 10px;
-            font-weight: bold;
-        }
-        </style>
-        </head>
-        <body>
-        <h1>Színpaletta</h1>
-        <div class="color-palette">
-        """
-        for color in colors:
-            html_content += f"""
-            <div class="color-box" style="background-color: {color['hex']};">
-                <div class="color-code">HEX: {color['hex']}</div>
-                <div class="color-code">RGB: {color['rgb']}</div>
-            </div>
-            """
-        
-        html_content += """
-        </div>
-        </body>
-        </html>
-        """
-        with open(file_path, "w") as f:
-            f.write(html_content)
+        import palette_engine
+        palette_engine.save_as_html(file_path, colors)
 
     # --- KÉP NAGYÍTÁSA ÉS MOZGATÁSA ---
     
@@ -489,7 +834,7 @@ class ImageColorApp:
             self.zoom_level /= 1.1
 
         # A nagyítási szint korlátozása
-        self.zoom_level = max(0.1, min(self.zoom_level, 10.0))
+        self.zoom_level = max(self.min_zoom, min(self.zoom_level, 10.0))
         self.update_canvas()
 
     # Mozgatás (pan) kezdete a jobb egérgomb lenyomására
@@ -516,27 +861,127 @@ class ImageColorApp:
         
         self.update_canvas()
 
-    # A canvas frissítése a nagyítás és a mozgatás hatására
-    def update_canvas(self):
+    # Canvas koordináta átváltása az eredeti kép koordinátáira (a nagyítás és a mozgatás szerint)
+    def canvas_to_image(self, x, y):
+        zoomed_x = x - (self.canvas.winfo_width() / 2) - self.pan_x
+        zoomed_y = y - (self.canvas.winfo_height() / 2) - self.pan_y
+        return (zoomed_x / self.zoom_level + self.original_image.width / 2,
+                zoomed_y / self.zoom_level + self.original_image.height / 2)
+
+    # A kép koordinátájának átváltása a canvas koordinátáira (a canvas_to_image fordítottja)
+    def image_to_canvas(self, x, y):
+        return ((x - self.original_image.width / 2) * self.zoom_level + self.canvas.winfo_width() / 2 + self.pan_x,
+                (y - self.original_image.height / 2) * self.zoom_level + self.canvas.winfo_height() / 2 + self.pan_y)
+
+    # --- KIJELÖLÉS ---
+
+    # Bal egérgomb lenyomása: kijelölő módban új kijelölés kezdődik, egyébként színválasztás
+    def on_left_press(self, event):
+        if SELECTION_MODES[self.selection_mode_var.get()] is None:
+            self.get_pixel_color(event)
+            return
         if not self.original_image:
             return
+        self.selection_points = [self.canvas_to_image(event.x, event.y)]
+        self.draw_selection()
 
-        new_size = (int(self.original_image.width * self.zoom_level),
-                    int(self.original_image.height * self.zoom_level))
-        
-        if new_size[0] > 0 and new_size[1] > 0:
-            # Az eredeti kép átméretezése az aktuális zoom szint szerint
-            self.current_image = self.original_image.resize(new_size, Image.Resampling.LANCZOS)
-            self.photo_image = ImageTk.PhotoImage(self.current_image)
-            self.canvas.delete("all")
-            # A kép elhelyezése az új pozíción
-            self.canvas.create_image(self.canvas.winfo_width() / 2 + self.pan_x,
-                                     self.canvas.winfo_height() / 2 + self.pan_y,
-                                     anchor=tk.CENTER, image=self.photo_image)
+    # Húzás közben a téglalap sarka követi az egeret, a lasszó pedig újabb ponttal bővül
+    def on_left_drag(self, event):
+        if not self.selection_points:
+            return
+        point = self.canvas_to_image(event.x, event.y)
+        if SELECTION_MODES[self.selection_mode_var.get()] == "box":
+            self.selection_points[1:] = [point]
+        else:
+            self.selection_points.append(point)
+        self.draw_selection()
+
+    # A húzás vége: a kijelölés rögzítése (a képre vágva), majd a top 10 szín elemzése csak a
+    # kijelölt területen. A húzás nélküli kattintás nem módosítja a kijelölést.
+    def on_left_release(self, event):
+        if not self.selection_points:
+            return
+        points, self.selection_points = self.selection_points, []
+        selection = None
+        if SELECTION_MODES[self.selection_mode_var.get()] == "box":
+            (x0, y0), (x1, y1) = points[0], points[-1]
+            width, height = self.original_image.size
+            box = (max(0, round(min(x0, x1))), max(0, round(min(y0, y1))),
+                   min(width, round(max(x0, x1))), min(height, round(max(y0, y1))))
+            if box[2] > box[0] and box[3] > box[1]:
+                selection = ("box", box)
+        elif len(points) >= 3:
+            selection = ("polygon", tuple((round(x, 1), round(y, 1)) for x, y in points))
+
+        if selection is None:
+            self.draw_selection()
+            return
+        self.selection = selection
+        self.draw_selection()
+        self.analyze_colors()
+
+    # A kijelölés törlése: az elemzések ismét az egész képre vonatkoznak
+    def clear_selection(self):
+        self.selection_points = []
+        if self.selection is None:
+            return
+        self.selection = None
+        self.draw_selection()
+        self.analyze_colors()
+
+    # A kijelölés (húzás közben a készülő kijelölés) kirajzolása a kép fölé, "selection" címkével
+    def draw_selection(self):
+        self.canvas.delete("selection")
+        if self.selection_points:
+            kind = SELECTION_MODES[self.selection_mode_var.get()]
+            points, closed = self.selection_points, False
+        elif self.selection is not None:
+            kind, data = self.selection
+            points = [data[:2], data[2:]] if kind == "box" else data
+            closed = True
+        else:
+            return
+
+        if kind == "box":
+            corners = self.image_to_canvas(*points[0]) + self.image_to_canvas(*points[-1])
+            self.canvas.create_rectangle(*corners, outline="red", dash=(4, 2), width=2, tags="selection")
+        elif len(points) >= 2:
+            coords = [c for point in points for c in self.image_to_canvas(*point)]
+            if closed:
+                self.canvas.create_polygon(*coords, outline="red", fill="", dash=(4, 2), width=2, tags="selection")
+            else:
+                self.canvas.create_line(*coords, fill="red", width=2, tags="selection")
+
+    # A canvas frissítése a nagyítás és a mozgatás hatására.
+    # A teljes kép átméretezése helyett csak a látható terület készül el csempékből,
+    # így a mozgatás és nagyítás a kép méretétől függetlenül gyors marad.
+    def update_canvas(self):
+        if not self.original_image or not self.viewport:
+            return
+
+        self.canvas.delete("all")
+        visible_image, position = self.viewport.render(self.zoom_level, self.pan_x, self.pan_y,
+                                                       self.canvas.winfo_width(), self.canvas.winfo_height())
+        if visible_image is None:
+            # A kép teljesen kilóg a látható területről
+            return
+
+        from PIL import ImageTk
+
+        self.current_image = visible_image
+        self.photo_image = ImageTk.PhotoImage(self.current_image)
+        # A kép elhelyezése: a bal felső sarka a látható terület kezdetén
+        self.canvas.create_image(position[0], position[1], anchor=tk.NW, image=self.photo_image)
+        self.draw_selection()
 
 # Fő végrehajtási blokk
 if __name__ == "__main__":
-    # Fő ablak létrehozása
+    # Ha parancssori argumentumokat kapott (pl. "batch"), ablak nélküli módban fut
+    if len(sys.argv) > 1:
+        import palette_cli
+        sys.exit(palette_cli.main(sys.argv[1:]))
+    # Fő ablak létrehozása; az indulás mérése innen az ablak első megjelenéséig az "window" szakasz
+    STARTUP_TRACE.begin("window")
     root = tk.Tk()
     # Az alkalmazás osztályának példányosítása, ami elindítja a GUI-t
     app = ImageColorApp(root)
@@ -0,0 +1,114 @@
+# Csempézett, csak a látható részt kirajzoló képmegjelenítő a nagyításhoz és mozgatáshoz.
+# A teljes kép helyett mindig csak a canvas-on látható terület készül el:
+#   - a kép előre kicsinyített szintjei (mipmap piramis) közül a nagyításhoz legközelebbi,
+#     de annál nem kisebb felbontású szintből dolgozik, így a kicsinyítés olcsó,
+#   - a nagyított képet TILE_SIZE méretű csempékre osztja, és csak a látható csempéket
+#     méretezi át (a Pillow resize box paraméterével: kivágás és átméretezés egy lépésben),
+#   - az elkészült csempéket egy LRU gyorsítótárban tartja, így mozgatáskor csak az újonnan
+#     láthatóvá vált csempék készülnek el.
+# A modul nem használ tkintert, csak Pillow-t; a kész képet a hívó alakítja PhotoImage-re.
+
+from collections import OrderedDict
+
+from PIL import Image
+
+# Egy csempe mérete a nagyított képen (képpont)
+TILE_SIZE = 256
+
+# A gyorsítótárban tartott csempék maximális száma (256x256 RGB csempénként ~200 KB)
+DEFAULT_MAX_TILES = 256
+
+
+class ViewportRenderer:
+
+    def __init__(self, image, max_tiles=DEFAULT_MAX_TILES, resample=Image.Resampling.LANCZOS):
+        # A palettás és egyéb módokat egyszer alakítja át, hogy a szűrős átméretezés működjön
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        self.width, self.height = image.size
+        self.resample = resample
+        self.max_tiles = max_tiles
+        # A piramis 0. szintje az eredeti kép, a többi szint lustán, 2-es lépésekben készül
+        self._levels = [image]
+        self._tiles = OrderedDict()
+
+    # A piramis adott szintje (az eredeti kép 2^level-ed része); szükség esetén elkészíti
+    def level(self, level):
+        while len(self._levels) <= level:
+            previous = self._levels[-1]
+            if previous.width < 2 or previous.height < 2:
+                return previous
+            self._levels.append(previous.reduce(2))
+        return self._levels[level]
+
+    # A nagyításhoz illő piramisszint: a legkisebb szint, ami még legalább akkora felbontású,
+    # mint a megjelenített kép (így legfeljebb 2-szeres kicsinyítés marad a csempékre)
+    def level_for_zoom(self, zoom):
+        level = 0
+        while zoom * (2 ** (level + 1)) <= 1.0:
+            level += 1
+        return level
+
+    # Egy csempe elkészítése (vagy visszaadása a gyorsítótárból). A (tile_x, tile_y) a csempe
+    # indexe a zoom szerint nagyított képen.
+    def tile(self, zoom, tile_x, tile_y):
+        key = (round(zoom, 9), tile_x, tile_y)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        zoomed_width = max(1, int(self.width * zoom))
+        zoomed_height = max(1, int(self.height * zoom))
+        left = tile_x * TILE_SIZE
+        top = tile_y * TILE_SIZE
+        right = min(left + TILE_SIZE, zoomed_width)
+        bottom = min(top + TILE_SIZE, zoomed_height)
+
+        # A csempe forrásterülete a kiválasztott piramisszinten
+        level = self.level_for_zoom(zoom)
+        source = self.level(level)
+        scale_x = source.width / zoomed_width
+        scale_y = source.height / zoomed_height
+        box = (left * scale_x, top * scale_y, right * scale_x, bottom * scale_y)
+        tile = source.resize((right - left, bottom - top), self.resample, box=box)
+
+        self._tiles[key] = tile
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+
+    # A látható terület kirajzolása. A kép középpontja a nézet közepétől (offset_x, offset_y)
+    # távolságra van, zoom-szoros nagyításban (ugyanaz a koordináta-rendszer, mint a
+    # színválasztásnál). Visszatér: (kép, (x, y)), ahol (x, y) a kép bal felső sarkának helye
+    # a nézetben; (None, None), ha a kép teljesen kilóg a nézetből.
+    def render(self, zoom, offset_x, offset_y, view_width, view_height):
+        zoomed_width = max(1, int(self.width * zoom))
+        zoomed_height = max(1, int(self.height * zoom))
+
+        # A nagyított kép bal felső sarka a nézetben
+        origin_x = int(round(view_width / 2 + offset_x - zoomed_width / 2))
+        origin_y = int(round(view_height / 2 + offset_y - zoomed_height / 2))
+
+        # A látható terület a nagyított kép koordinátáiban
+        left = max(0, -origin_x)
+        top = max(0, -origin_y)
+        right = min(zoomed_width, view_width - origin_x)
+        bottom = min(zoomed_height, view_height - origin_y)
+        if right <= left or bottom <= top:
+            return None, None
+
+        # A látható csempék összeillesztése egyetlen képpé
+        first_x, last_x = left // TILE_SIZE, (right - 1) // TILE_SIZE
+        first_y, last_y = top // TILE_SIZE, (bottom - 1) // TILE_SIZE
+        mode = self._levels[0].mode
+        viewport = Image.new(mode, (right - left, bottom - top))
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                viewport.paste(self.tile(zoom, tile_x, tile_y),
+                               (tile_x * TILE_SIZE - left, tile_y * TILE_SIZE - top))
+        return viewport, (origin_x + left, origin_y + top)
+
+    # A csempe-gyorsítótár ürítése (pl. ha a megjelenített kép megváltozik)
+    def clear(self):
+        self._tiles.clear()
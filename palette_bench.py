@@ -0,0 +1,315 @@
+# Teljesítménymérés a program kritikus útvonalaira, szintetikus képeken.
+# Használat:
+#   python palette_bench.py                          # mérés, eredmény a szabványos kimenetre (JSON)
+#   python palette_bench.py -o eredmeny.json --save-baseline alap.json
+#   python palette_bench.py --baseline alap.json     # összehasonlítás egy korábbi méréssel
+# A mért útvonalak:
+#   analyze/<algoritmus>         - a "Top 10 szín" elemzés (analyze_colors): a GUI beállításával
+#                                  (NumPy k-means) a csúszka aljától 10-ig tartó extract_range lánc,
+#                                  képpontszámok nélkül; a 10 színű paletta a végeredmény
+#   palette_range/<algoritmus>   - a "Paletta generálása" a csúszka teljes 2-32 tartományára,
+#                                  ugyanígy a GUI beállításával
+#   analyze/<algoritmus>/<tér>   - a "Top 10 szín" CIELAB / OKLab színtérben
+#   analyze/<algoritmus>/sklearn - a "Top 10 szín" lánca a scikit-learn-nel (összehasonlításként;
+#                                  a GUI nem ezt használja)
+#   extract/<algoritmus>/k<k>    - kötegelt kinyerés pontos képpontszámokkal
+#   posterize/<módszer>/k<k>     - a "Poszterizálás" (minden képpont a legközelebbi palettaszínre)
+#   region/box, region/lasso     - a "Top 10 szín" egy 256x256-os téglalap és egy lasszó (háromszög)
+#                                  kijelölésen; az idő a kijelölés méretétől függ, nem a képétől
+#   render/zoom<z>               - a nagyítás/mozgatás kirajzolása (az update_canvas által hívott
+#                                  ViewportRenderer; a PhotoImage konverzió Tk ablakot igényelne)
+#   export/txt, export/html      - mentés nagy palettákkal
+#   startup/import/<modul>       - egy modul importja új Python folyamatban (a GUI, a motor és a
+#                                  scikit-learn); az ablak megjelenéséig eltelt időt a GUI maga
+#                                  méri (DDCOLORS_TRACE, "Indulás")
+# Minden esethez: futási idő (a mérések mediánja), csúcs memória (RSS) és képpont/másodperc.
+# A baseline-hoz képest a megadott tűrésnél lassabb esetek hibakóddal (1) jelzik a regressziót.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+import image_viewport
+import palette_engine
+
+try:
+    import resource
+except ImportError:
+    # Windows alatt nincs resource modul; ott a csúcs memória nem mérhető
+    resource = None
+
+# A szintetikus képek típusai
+IMAGE_KINDS = ("gradient", "noise", "poster")
+
+# Alapértelmezett képméretek megapixelben
+DEFAULT_SIZES = (0.25, 1.0, 4.0)
+
+# A regresszió tűrése: ennyivel lassabb eset még nem számít regressziónak (0.25 = 25%)
+DEFAULT_TOLERANCE = 0.25
+
+# Az indulási mérés moduljai (importjuk új folyamatban)
+STARTUP_MODULES = ("ddcolors", "palette_engine", "sklearn.cluster")
+
+# A GUI színszámai: a "Top 10 szín" a csúszka aljától 10-ig tartó lánc (lásd
+# ImageColorApp.analyze_colors), a "Paletta generálása" a csúszka teljes tartománya
+TOP_K_VALUES = range(2, 11)
+PALETTE_K_VALUES = range(2, 33)
+
+
+# --- SZINTETIKUS KÉPEK ---
+
+# Egy determinisztikus szintetikus kép adott típussal és mérettel (megapixel)
+def synthetic_image(kind, megapixels, seed=0):
+    height = max(1, int((megapixels * 1e6 * 3 / 4) ** 0.5))
+    width = max(1, int(megapixels * 1e6 / height))
+    rng = np.random.default_rng(seed)
+    if kind == "gradient":
+        # Sima színátmenetek: sok különböző, de folytonosan változó szín
+        y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+        pixels = np.stack([255 * x / width, 255 * y / height, 128 + 127 * np.sin((x + y) / 200)], axis=2)
+    elif kind == "noise":
+        # Egyenletes zaj: a legrosszabb eset a hisztogramnak (minden cella foglalt)
+        pixels = rng.integers(0, 256, (height, width, 3))
+    elif kind == "poster":
+        # Plakátszerű kép kevés, egyszínű téglalappal
+        pixels = np.zeros((height, width, 3), dtype=np.uint8)
+        colors = rng.integers(0, 256, (12, 3))
+        for color in colors:
+            top, left = rng.integers(0, height), rng.integers(0, width)
+            pixels[top:top + height // 3, left:left + width // 3] = color
+    else:
+        raise ValueError(f"Ismeretlen képtípus: {kind}")
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+
+
+# --- MÉRÉS ---
+
+# A csúcs memória (VmHWM) nullázása Linuxon, hogy esetenként mérhető legyen
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+# A folyamat csúcs memóriája MB-ban (Linuxon a legutóbbi nullázás óta), vagy None
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS bájtban, Linux kilobájtban adja meg
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# Egy eset mérése: a func() repeat-szer fut, az idő a mediánjuk
+def measure(name, func, pixels, repeat=3):
+    func()  # bemelegítés (lusta importok, gyorsítótárak)
+    _reset_peak_rss()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    wall = statistics.median(timings)
+    return {
+        "name": name,
+        "pixels": pixels,
+        "wall_s": round(wall, 5),
+        "peak_rss_mb": _peak_rss_mb(),
+        "pixels_per_s": round(pixels / wall) if wall > 0 and pixels else None,
+    }
+
+
+# Az összes eset lefuttatása; az eredmények listája
+def run_benchmarks(sizes=DEFAULT_SIZES, kinds=IMAGE_KINDS, repeat=3, log=None):
+    results = []
+
+    def record(name, func, pixels):
+        result = measure(name, func, pixels, repeat)
+        results.append(result)
+        if log:
+            log(f"{name:<48} {result['wall_s'] * 1000:10.1f} ms  {result['peak_rss_mb']} MB")
+
+    for megapixels in sizes:
+        for kind in kinds:
+            image = synthetic_image(kind, megapixels)
+            pixels = image.width * image.height
+            prefix = f"{kind}/{megapixels}MP"
+
+            for algorithm in palette_engine.ALGORITHMS:
+                # A GUI beállítása (gyorsítótár nélkül, hogy minden ismétlés számoljon)
+                gui_extractor = palette_engine.PaletteExtractor(algorithm=algorithm, backend="numpy")
+                record(f"{prefix}/analyze/{algorithm}",
+                       lambda: gui_extractor.extract_range(image, TOP_K_VALUES, with_counts=False), pixels)
+                record(f"{prefix}/palette_range/{algorithm}",
+                       lambda: gui_extractor.extract_range(image, PALETTE_K_VALUES, with_counts=False), pixels)
+                for color_space in ("lab", "oklab"):
+                    space_extractor = palette_engine.PaletteExtractor(algorithm=algorithm, color_space=color_space,
+                                                                      backend="numpy")
+                    record(f"{prefix}/analyze/{algorithm}/{color_space}",
+                           lambda: space_extractor.extract_range(image, TOP_K_VALUES, with_counts=False), pixels)
+                # A kötegelt mód alapértelmezése (scikit-learn)
+                extractor = palette_engine.PaletteExtractor(algorithm=algorithm)
+                record(f"{prefix}/analyze/{algorithm}/sklearn",
+                       lambda: extractor.extract_range(image, TOP_K_VALUES, with_counts=False), pixels)
+                for k in (8, 32):
+                    record(f"{prefix}/extract/{algorithm}/k{k}",
+                           lambda: extractor.extract(image, n_colors=k), pixels)
+
+            palette = np.random.default_rng(1).integers(0, 256, (16, 3))
+            for method in ("exact", "lut"):
+                mapper = palette_engine.PaletteMapper(palette, method)
+                record(f"{prefix}/posterize/{method}/k16", lambda: mapper.posterize(image), pixels)
+
+            # Kijelölés a kép közepén, a GUI beállításával (NumPy k-means) és RGB pufferéből
+            array = palette_engine.to_rgb_array(image)
+            cx, cy = image.width // 2, image.height // 2
+            box = (cx - 128, cy - 128, cx + 128, cy + 128)
+            lasso = ((cx - 128, cy + 128), (cx, cy - 128), (cx + 128, cy + 128))
+            region_extractor = palette_engine.PaletteExtractor(backend="numpy")
+            record(f"{prefix}/region/box",
+                   lambda: region_extractor.extract_range(palette_engine.region_pixels(array, box=box),
+                                                          TOP_K_VALUES, with_counts=False), 256 * 256)
+            record(f"{prefix}/region/lasso",
+                   lambda: region_extractor.extract_range(palette_engine.region_pixels(array, polygon=lasso),
+                                                          TOP_K_VALUES, with_counts=False), 256 * 128)
+
+            # Kirajzolás: első kép egy új rendererrel, majd 20 mozgatási lépés
+            for zoom in (0.25, 1.0, 10.0):
+                view_pixels = 900 * 780
+
+                def render_cold():
+                    image_viewport.ViewportRenderer(image).render(zoom, 0, 0, 900, 780)
+
+                renderer = image_viewport.ViewportRenderer(image)
+
+                def render_pan():
+                    for step in range(20):
+                        renderer.render(zoom, step * 7, step * 3, 900, 780)
+
+                record(f"{prefix}/render/zoom{zoom}/cold", render_cold, view_pixels)
+                record(f"{prefix}/render/zoom{zoom}/pan20", render_pan, view_pixels * 20)
+
+    # Indulás: a modulok importja egy új folyamatban (a mérés a folyamat indítását is tartalmazza,
+    # ezért egy üres folyamat ideje is szerepel viszonyításként)
+    root = os.path.dirname(os.path.abspath(__file__))
+    for module in ("",) + STARTUP_MODULES:
+        command = [sys.executable, "-c", f"import {module}" if module else "pass"]
+        record(f"startup/import/{module or 'python'}",
+               lambda: subprocess.run(command, cwd=root, check=True), 0)
+
+    # Mentés nagy palettákkal
+    with tempfile.TemporaryDirectory() as directory:
+        rng = np.random.default_rng(0)
+        for n_colors in (1000, 10000):
+            colors = rng.integers(0, 256, (n_colors, 3))
+            # Ugyanaz az út, mint a GUI-ban: az eredménymodellből készül a szöveg és a színlista
+            result_list = palette_engine.ResultList("Paletta:", colors)
+            txt_path = os.path.join(directory, "paletta.txt")
+            html_path = os.path.join(directory, "paletta.html")
+            record(f"export/txt/{n_colors}", lambda: palette_engine.save_as_txt(txt_path, result_list.to_text()), 0)
+            record(f"export/html/{n_colors}",
+                   lambda: palette_engine.save_as_html(html_path, result_list.color_dicts()), 0)
+
+    return results
+
+
+# A futtatási környezet leírása (a mérések összehasonlíthatóságához)
+def environment():
+    import PIL
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+    }
+    try:
+        import sklearn
+        info["sklearn"] = sklearn.__version__
+    except ImportError:
+        info["sklearn"] = None
+    return info
+
+
+# --- ÖSSZEHASONLÍTÁS ---
+
+# A mérés összevetése egy baseline-nal. Visszatér: a regressziók listája
+# (név, baseline idő, mostani idő, arány), ahol az arány > 1 + tolerance.
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    previous = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = previous.get(result["name"])
+        if not base or not base["wall_s"]:
+            continue
+        ratio = result["wall_s"] / base["wall_s"]
+        result["baseline_wall_s"] = base["wall_s"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append((result["name"], base["wall_s"], result["wall_s"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kép szín elemző - teljesítménymérés")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Képméretek megapixelben, vesszővel elválasztva (alapértelmezett: %(default)s)")
+    parser.add_argument("--kinds", default=",".join(IMAGE_KINDS),
+                        help="Szintetikus képtípusok (alapértelmezett: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Ismétlések száma esetenként (medián)")
+    parser.add_argument("--quick", action="store_true", help="Gyors mérés: csak 0.25 MP, egy ismétlés")
+    parser.add_argument("-o", "--output", help="Az eredmény JSON fájlja (alapértelmezett: szabványos kimenet)")
+    parser.add_argument("--baseline", help="Összehasonlítás ezzel a korábbi eredménnyel")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Az eredmény elmentése új baseline-ként")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Megengedett lassulás aránya (alapértelmezett: %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = (0.25,) if args.quick else tuple(float(s) for s in args.sizes.split(","))
+    repeat = 1 if args.quick else args.repeat
+    kinds = tuple(args.kinds.split(","))
+
+    results = run_benchmarks(sizes, kinds, repeat, log=lambda line: print(line, file=sys.stderr))
+    report = {"environment": environment(), "results": results}
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["regressions"] = [name for name, *_ in regressions]
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSZIÓ {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({ratio:.2f}x)",
+                  file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
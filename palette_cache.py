@@ -0,0 +1,98 @@
+# Elemzési gyorsítótár: ugyanarra a képre és beállításokra nem fut le újra a klaszterezés.
+# A kulcs a kép tartalmának hash-éből, a színek számából, az algoritmusból és a többi
+# paraméterből áll. A memóriában egy méretkorlátos LRU tárolja a legutóbbi eredményeket,
+# opcionálisan pedig egy SQLite fájl, ami futások között is megmarad (kötegelt módhoz).
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from palette_engine import PaletteResult
+
+# A memóriában tartott eredmények alapértelmezett maximális száma
+DEFAULT_MAX_ENTRIES = 128
+
+
+class AnalysisCache:
+
+    # max_entries: a memóriában tartott eredmények száma; path: opcionális SQLite fájl
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        # A GUI háttérszálból és a fő szálból is elérheti
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            # Több munkafolyamat is írhatja egyszerre, ezért WAL mód és türelmes zárolás
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS palettes (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    # A gyorsítótár kulcsa. A params szótár kulcsai rendezve kerülnek bele,
+    # így a paraméterek sorrendje nem számít.
+    @staticmethod
+    def make_key(digest, n_colors, algorithm, params=None):
+        params_text = json.dumps(params or {}, sort_keys=True, separators=(",", ":"))
+        return f"{digest}:{n_colors}:{algorithm}:{params_text}"
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Eredmény lekérdezése; None, ha nincs a gyorsítótárban.
+    # A lemezről betöltött eredmény a memóriába is bekerül.
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM palettes WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = PaletteResult.from_dict(json.loads(row[0]))
+                    self._remember(key, result)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    # Eredmény elmentése a memóriába és (ha van) a lemezre
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, result)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO palettes (key, value) VALUES (?, ?)",
+                                 (key, json.dumps(result.to_dict())))
+                self._db.commit()
+
+    # Az LRU frissítése; a legrégebben használt elem kiesik, ha megtelt
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # Találati statisztika
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits,
+                "entries": len(self._entries)}
+
+    # A memóriában tárolt eredmények törlése (a lemezen lévők megmaradnak)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
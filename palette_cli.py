@@ -0,0 +1,405 @@
+# Parancssori (ablak nélküli) mód a palettakinyeréshez.
+# Használat:
+#   python ddcolors.py batch kepek/ "fotok/**/*.jpg" egy.png -n 8 -j 4 -o eredmeny.ndjson
+#   python ddcolors.py batch kepek/ -o paletta.gpl     (formátum a kiterjesztésből vagy -f-fel)
+#   python ddcolors.py collection fotozas/ -r -n 8 --deviations 10
+#   python ddcolors.py serve --port 8765 -j 4
+# A "batch" minden képhez egy JSON sort ír ki (NDJSON), amint az adott kép elkészült,
+# a végén pedig egy összesítést a szabványos hibakimenetre (stderr). A -f/--format más
+# formátumot választ (JSON, CSV, GIMP, Adobe ASE, lapozható HTML kontaktlap, lásd palette_export.py);
+# ezek is képenként, folyamatosan íródnak.
+# A "collection" egyetlen közös palettát készít az összes képből (lásd palette_collection.py).
+# A "serve" helyi HTTP szolgáltatásként fut (lásd palette_server.py).
+
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import palette_export
+
+# A támogatott képkiterjesztések (ugyanazok, mint a GUI fájl párbeszédablakában)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".bmp", ".png", ".webp", ".tiff", ".tif")
+
+
+# --- BEMENETEK ---
+
+# Igaz, ha a fájl kiterjesztése alapján képnek tűnik
+def is_image_file(path):
+    return path.lower().endswith(IMAGE_EXTENSIONS)
+
+
+# A parancssori bemenetek (fájlok, glob minták, mappák) kibontása fájlok listájává.
+# A sorrend megmarad, a duplikátumok kimaradnak.
+def expand_inputs(inputs, recursive=False):
+    seen = set()
+    paths = []
+
+    def add(path):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            paths.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                for dir_path, dir_names, file_names in os.walk(item):
+                    dir_names.sort()
+                    for name in sorted(file_names):
+                        if is_image_file(name):
+                            add(os.path.join(dir_path, name))
+            else:
+                for name in sorted(os.listdir(item)):
+                    path = os.path.join(item, name)
+                    if os.path.isfile(path) and is_image_file(name):
+                        add(path)
+        elif glob.has_magic(item):
+            for path in sorted(glob.glob(item, recursive=True)):
+                if os.path.isfile(path) and is_image_file(path):
+                    add(path)
+        else:
+            # A nem létező fájlokat is átengedi, hogy hibaként jelenjenek meg az eredményben
+            add(item)
+    return paths
+
+
+# --- FELDOLGOZÁS (munkafolyamatokban fut) ---
+
+# Munkafolyamat indításakor a BLAS/OpenMP szálak számát egyre korlátozza,
+# hogy a párhuzamos folyamatok ne versenyezzenek egymással a magokért.
+def _init_worker():
+    global _thread_limits
+    try:
+        from threadpoolctl import threadpool_limits
+        _thread_limits = threadpool_limits(limits=1)
+    except ImportError:
+        pass
+
+
+# A munkafolyamat saját gyorsítótára (folyamatonként egy SQLite kapcsolat)
+_cache = None
+
+
+# A munkafolyamat gyorsítótárának megnyitása az első használatkor
+def _worker_cache(path):
+    global _cache
+    if _cache is None or _cache.path != path:
+        import palette_cache
+        _cache = palette_cache.AnalysisCache(path=path)
+    return _cache
+
+
+# Egyetlen kép elemzése. Sosem dob kivételt: a hibát az eredményben adja vissza,
+# így egy hibás kép nem szakítja meg a teljes futást.
+# Az options szótár a PaletteExtractor paramétereit tartalmazza (pl. n_colors, algorithm);
+# a hiányzó paramétereknél a motor alapértelmezései érvényesek.
+# Ha cache_path meg van adva, az eredmények egy SQLite gyorsítótárba kerülnek, és a
+# korábbi futásokban már elemzett képek újraillesztés nélkül jönnek vissza.
+# Ha k_values (színszámok listája) meg van adva, a teljes tartomány palettái egy menetben
+# készülnek, és az eredmény "palettes" kulcsa alatt színszámonként szerepelnek.
+# Ha chunk_size meg van adva, a kép darabonként (legfeljebb ennyi képpontonként) olvasódik be,
+# a teljes képpontlista memóriába töltése nélkül (csak egy színszámnál).
+# Ha timings igaz, a rekord "timings" kulcsa alatt a szakaszonkénti idők (másodperc) is szerepelnek.
+# Ha mask meg van adva (maszk fájl vagy minta, lásd resolve_mask_path), csak a maszk által kijelölt
+# képpontok számítanak; maszkolt képnél a darabonkénti beolvasás nem használható. Az átlátszó
+# képpontok alapértelmezetten kimaradnak (include_transparent igaz esetén nem), ezt a
+# palette_engine.PaletteExtractor végzi, darabonkénti beolvasásnál is.
+def analyze_file(path, options, cache_path=None, k_values=None, chunk_size=None, timings=False,
+                 mask=None, include_transparent=False):
+    mask_path = resolve_mask_path(mask, path) if mask else None
+    return _analyze(path, {"path": path}, options, cache_path, k_values, chunk_size, timings,
+                    mask_path, include_transparent)
+
+
+# A kép maszkjának útvonala a --mask mintából: {stem} a kép neve kiterjesztés nélkül, {name} a
+# fájlnév, {dir} a kép mappája (pl. "{dir}/maszkok/{stem}.png"); helyettesítés nélküli minta
+# esetén minden kép ugyanazt a maszkot kapja
+def resolve_mask_path(template, path):
+    name = os.path.basename(path)
+    return template.format(stem=os.path.splitext(name)[0], name=name, dir=os.path.dirname(path) or ".")
+
+
+# Egy kép elemzése a memóriában kapott fájltartalomból (pl. a "serve" mód HTTP kéréseiből).
+# Ugyanaz, mint az analyze_file, csak a kimeneti rekordban nincs "path".
+def analyze_bytes(data, options, cache_path=None, k_values=None, timings=False):
+    return _analyze(io.BytesIO(data), {}, options, cache_path, k_values, timings=timings)
+
+
+# Az analyze_file és az analyze_bytes közös része; a source egy fájlútvonal vagy fájlszerű
+# objektum, a header a kimeneti rekord kezdete (pl. a fájl útvonala)
+def _analyze(source, header, options, cache_path=None, k_values=None, chunk_size=None, timings=False,
+             mask=None, include_transparent=False):
+    start = time.perf_counter()
+    trace = None
+    try:
+        from PIL import Image
+        import palette_engine
+
+        cache = _worker_cache(cache_path) if cache_path else None
+        hits_before = cache.hits if cache else 0
+        if timings:
+            import palette_trace
+            trace = palette_trace.Trace()
+        progress = trace.progress if trace else None
+        with Image.open(source) as image:
+            width, height = image.size
+            # Az átlátszó képpontokat a motor hagyja ki (ha az include_transparent nem kéri őket)
+            extractor = palette_engine.PaletteExtractor(cache=cache, include_transparent=include_transparent,
+                                                        **options)
+            selected = palette_engine.load_mask(mask, image.size) if mask else None
+            if k_values:
+                results = extractor.extract_range(image, k_values, progress=progress, mask=selected)
+            elif chunk_size and selected is None:
+                result = extractor.extract_file(source, chunk_size=chunk_size, progress=progress)
+            else:
+                if trace and selected is None:
+                    # A dekódolás külön szakasz; a motor első haladásjelzése zárja le
+                    trace.begin("decode")
+                    image.load()
+                result = extractor.extract(image, progress=progress, mask=selected)
+        record = dict(header, ok=True, width=width, height=height)
+        if cache:
+            record["cached"] = cache.hits > hits_before
+        if k_values:
+            record["palettes"] = {str(k): r.to_dict() for k, r in results.items()}
+        else:
+            record.update(result.to_dict())
+    except Exception as e:
+        record = dict(header, ok=False, error=f"{type(e).__name__}: {e}")
+    if trace:
+        record["timings"] = trace.finish()
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return record
+
+
+# --- KÖTEGELT FUTTATÁS ---
+
+# A képek szétosztása a folyamatkészletre. Egyszerre legfeljebb workers * 4 feladat
+# van beküldve, így több tízezer kép esetén sem nő a várakozó feladatok listája.
+# Az eredmények a befejezés sorrendjében érkeznek az on_result függvényhez.
+# A további kulcsszavas paramétereket (cache_path, k_values, chunk_size, timings) az analyze_file kapja.
+def run_batch(paths, options, workers=None, on_result=None, **analyze_options):
+    workers = workers or os.cpu_count() or 1
+    summary = {"images": len(paths), "ok": 0, "failed": 0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = {}
+        queue = iter(paths)
+        max_in_flight = workers * 4
+
+        def submit_next():
+            for path in queue:
+                pending[executor.submit(analyze_file, path, options, **analyze_options)] = path
+                if len(pending) >= max_in_flight:
+                    break
+
+        submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # Pl. ha egy munkafolyamat összeomlott
+                    record = {"path": path, "ok": False, "error": f"{type(e).__name__}: {e}"}
+                summary["ok" if record["ok"] else "failed"] += 1
+                if record.get("cached"):
+                    summary["cache_hits"] = summary.get("cache_hits", 0) + 1
+                if on_result:
+                    on_result(record)
+            submit_next()
+
+    elapsed = time.perf_counter() - start
+    summary["workers"] = workers
+    summary["elapsed_s"] = round(elapsed, 3)
+    summary["images_per_s"] = round(len(paths) / elapsed, 2) if elapsed > 0 else 0.0
+    return summary
+
+
+# A színek számának értelmezése: egy szám ("8"), tartomány ("2-32") vagy lista ("4,8,16")
+def parse_color_counts(value):
+    k_values = []
+    try:
+        for part in value.split(","):
+            if "-" in part:
+                low, high = part.split("-", 1)
+                k_values.extend(range(int(low), int(high) + 1))
+            else:
+                k_values.append(int(part))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Érvénytelen színszám: {value}")
+    if not k_values or min(k_values) < 1:
+        raise argparse.ArgumentTypeError(f"Érvénytelen színszám: {value}")
+    return sorted(set(k_values))
+
+
+# A PaletteExtractor paraméterei a parancssori argumentumokból
+def extractor_options(args):
+    options = {"n_colors": args.colors[0], "algorithm": args.algorithm, "color_space": args.color_space}
+    if args.max_samples is not None:
+        options["max_samples"] = args.max_samples
+    if args.backend != "sklearn":
+        options["backend"] = args.backend
+    return options
+
+
+# A "batch" parancs végrehajtása
+def cmd_batch(args):
+    paths = expand_inputs(args.inputs, recursive=args.recursive)
+    if not paths:
+        print("Nem található feldolgozható kép.", file=sys.stderr)
+        return 2
+    if args.mask:
+        try:
+            resolve_mask_path(args.mask, paths[0])
+        except (KeyError, IndexError, ValueError) as e:
+            print(f"Érvénytelen maszk minta: {args.mask} ({e}; használható: {{stem}}, {{name}}, {{dir}})",
+                  file=sys.stderr)
+            return 2
+
+    # A formátum: -f, különben a kimeneti fájl kiterjesztése, különben NDJSON
+    file_format = args.format or palette_export.format_for_path(args.output) or "ndjson"
+    try:
+        writer = palette_export.open_writer(args.output, file_format)
+    except ValueError as e:
+        print(f"{e} (-o)", file=sys.stderr)
+        return 2
+    with writer:
+        summary = run_batch(paths, extractor_options(args), workers=args.workers, on_result=writer.write,
+                            cache_path=args.cache, k_values=args.colors if len(args.colors) > 1 else None,
+                            chunk_size=args.chunk_size, timings=args.timings, mask=args.mask,
+                            include_transparent=args.include_transparent)
+
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+# A "collection" parancs végrehajtása: egy közös paletta az összes képből
+def cmd_collection(args):
+    import palette_collection
+
+    paths = expand_inputs(args.inputs, recursive=args.recursive)
+    if not paths:
+        print("Nem található feldolgozható kép.", file=sys.stderr)
+        return 2
+
+    file_format = args.format or palette_export.format_for_path(args.output) or "ndjson"
+    try:
+        writer = palette_export.open_writer(args.output, file_format)
+    except ValueError as e:
+        print(f"{e} (-o)", file=sys.stderr)
+        return 2
+
+    def report_error(record):
+        print(json.dumps(record, ensure_ascii=False), file=sys.stderr)
+
+    with writer:
+        record = palette_collection.build_collection_palette(
+            paths, extractor_options(args), workers=args.workers,
+            k_values=args.colors if len(args.colors) > 1 else None, deviations=args.deviations,
+            chunk_size=args.chunk_size, on_error=report_error)
+        writer.write(record)
+    if not record["ok"]:
+        print(record["error"], file=sys.stderr)
+        return 1
+    return 0
+
+
+# A "serve" parancs végrehajtása
+def cmd_serve(args):
+    import palette_server
+
+    workers = args.workers or os.cpu_count() or 1
+    return palette_server.serve(args.host, args.port, workers, args.queue_size, extractor_options(args),
+                                cache_path=args.cache, log=lambda line: print(line, file=sys.stderr))
+
+
+# Az elemző beállításai, amelyek a "batch" és a "serve" parancsnál is megadhatók
+def add_extractor_arguments(parser):
+    parser.add_argument("-n", "--colors", type=parse_color_counts, default=[10],
+                        help="A paletta színeinek száma; tartomány (2-32) vagy lista (4,8,16) esetén "
+                             "minden színszámra készül paletta egy menetben (alapértelmezett: 10)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Párhuzamos munkafolyamatok száma (alapértelmezett: CPU magok száma)")
+    parser.add_argument("-a", "--algorithm", choices=("kmeans", "histogram"), default="kmeans",
+                        help="Klaszterező algoritmus (alapértelmezett: kmeans)")
+    parser.add_argument("-s", "--color-space", choices=("rgb", "lab", "oklab"), default="rgb",
+                        help="A klaszterezés színtere; lab/oklab esetén a színek észlelt eltérése (ΔE) "
+                             "számít (alapértelmezett: rgb)")
+    parser.add_argument("--max-samples", type=int, default=None,
+                        help="Legfeljebb ennyi képpontmintán fut az illesztés; 0 = minden képpont "
+                             "(alapértelmezett: 200000)")
+    parser.add_argument("--backend", choices=("sklearn", "numpy"), default="sklearn",
+                        help="A klaszterezés megvalósítása; numpy esetén a scikit-learn nem töltődik be "
+                             "(alapértelmezett: sklearn)")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="SQLite gyorsítótár fájl; a már elemzett képek újraillesztés nélkül jönnek vissza")
+
+
+# A parancssori argumentumok leírása
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ddcolors", description="Kép szín elemző - parancssori mód")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Paletta kinyerése sok képből párhuzamosan (NDJSON kimenet)")
+    batch.add_argument("inputs", nargs="+", help="Képfájlok, glob minták vagy mappák")
+    add_extractor_arguments(batch)
+    batch.add_argument("-r", "--recursive", action="store_true", help="A mappák bejárása rekurzívan")
+    batch.add_argument("--chunk-size", type=int, default=None, metavar="PIXELS",
+                       help="A képek darabonkénti beolvasása legfeljebb ennyi képpontonként; a csúcsmemóriát "
+                            "a darabméret korlátozza, nem a kép mérete (nagyon nagy TIFF szkennekhez)")
+    batch.add_argument("--mask", metavar="FILE",
+                       help="Maszk kép: csak a kijelölt (fehér vagy nem átlátszó) képpontok számítanak. "
+                            "Képenként külön maszkhoz minta adható, pl. \"{dir}/maszkok/{stem}.png\" "
+                            "({stem}, {name}, {dir} helyettesítéssel)")
+    batch.add_argument("--include-transparent", action="store_true",
+                       help="Az átlátszó képpontok is számítanak (alapértelmezetten kimaradnak)")
+    batch.add_argument("--timings", action="store_true",
+                       help="Képenként a szakaszonkénti idők (dekódolás, konvertálás, klaszterezés...) "
+                            "is bekerülnek az eredménybe")
+    batch.add_argument("-o", "--output", help="Kimeneti fájl (alapértelmezett: szabványos kimenet)")
+    batch.add_argument("-f", "--format", choices=tuple(palette_export.FORMATS), default=None,
+                       help="A kimenet formátuma (alapértelmezett: a kimeneti fájl kiterjesztése alapján, "
+                            "egyébként ndjson); az ase és a html csak fájlba írható")
+    batch.set_defaults(func=cmd_batch)
+
+    collection = commands.add_parser("collection", help="Egyetlen közös paletta sok képből (pl. egy fotózás képeiből)")
+    collection.add_argument("inputs", nargs="+", help="Képfájlok, glob minták vagy mappák")
+    add_extractor_arguments(collection)
+    collection.add_argument("-r", "--recursive", action="store_true", help="A mappák bejárása rekurzívan")
+    collection.add_argument("--chunk-size", type=int, default=None, metavar="PIXELS",
+                            help="A képek darabonkénti beolvasása legfeljebb ennyi képpontonként")
+    collection.add_argument("--deviations", type=int, default=0, metavar="N",
+                            help="Az N, a közös palettától legjobban eltérő kép listája (a képek "
+                                 "második beolvasásával; alapértelmezett: 0 = nincs)")
+    collection.add_argument("-o", "--output", help="Kimeneti fájl (alapértelmezett: szabványos kimenet)")
+    collection.add_argument("-f", "--format", choices=tuple(palette_export.FORMATS), default=None,
+                            help="A kimenet formátuma (alapértelmezett: a kimeneti fájl kiterjesztése "
+                                 "alapján, egyébként ndjson)")
+    collection.set_defaults(func=cmd_collection)
+
+    serve = commands.add_parser("serve", help="Helyi HTTP/JSON palettaszolgáltatás (POST /extract, GET /health)")
+    add_extractor_arguments(serve)
+    serve.add_argument("--host", default="127.0.0.1", help="A figyelt cím (alapértelmezett: %(default)s)")
+    serve.add_argument("--port", type=int, default=8765, help="A figyelt port (alapértelmezett: %(default)s)")
+    serve.add_argument("--queue-size", type=int, default=None,
+                       help="Ennyi kérés várakozhat a futók mögött; a sor megtelésekor a szerver 429-cel "
+                            "válaszol (alapértelmezett: munkafolyamatok száma * 4)")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# Közös paletta egy teljes képgyűjteményhez (pl. egy fotózás összes képéhez).
+# Használat:
+#   python ddcolors.py collection fotozas/ -r -n 8 -s lab --deviations 10 -o fotozas.gpl
+# A képek párhuzamosan, képenként egy színhisztogrammá alakulnak (a munkafolyamatokban,
+# darabonkénti beolvasással), a fő folyamat pedig a tömör hisztogramokat egyetlen összesített
+# hisztogramba vonja össze, amint megérkeznek. A képpontok sosem kerülnek egy közös tömbbe:
+# a memória a képek számától független (egy ~1 MB-os összesített hisztogram és a futó képek).
+# A paletta végül az összevont hisztogramon készül (súlyozott KMeans a foglalt cellákon).
+# Az összevonás egész számokkal dolgozik, így az eredmény nem függ a képek beérkezési
+# sorrendjétől és a munkafolyamatok számától.
+# Ha deviations > 0, egy második menet képenként megméri, mennyire tér el a kép a közös
+# palettától (lásd palette_engine.palette_deviation), és a legjobban eltérő képeket adja vissza.
+# Ehhez a képeket még egyszer be kell olvasni.
+
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import palette_cli
+
+
+# --- MUNKAFOLYAMATOK ---
+
+# Egy kép színhisztogramja darabonkénti beolvasással. Az átlátszó képpontokat az
+# iter_pixel_chunks hagyja ki, így az átlátszó képek is darabonként olvasódnak.
+def _file_histogram(path, chunk_size):
+    import palette_engine
+
+    histogram = palette_engine.ColorHistogram()
+    for chunk in palette_engine.iter_pixel_chunks(path, chunk_size):
+        histogram.add(chunk)
+    if histogram.total == 0:
+        raise ValueError("A kijelölt terület üres")
+    return histogram
+
+
+# Első menet: a kép tömör hisztogramja. Sosem dob kivételt, a hibát az eredményben adja vissza.
+def histogram_file(path, chunk_size):
+    try:
+        return {"path": path, "ok": True, "histogram": _file_histogram(path, chunk_size).compact()}
+    except Exception as e:
+        return {"path": path, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+# Második menet: a kép eltérése a közös palettától (átlag és 95. percentilis a színtérben)
+def deviation_file(path, colors, color_space, chunk_size):
+    import palette_engine
+
+    try:
+        mean, p95 = palette_engine.palette_deviation(_file_histogram(path, chunk_size), colors, color_space)
+        return {"path": path, "ok": True, "mean": round(mean, 4), "p95": round(p95, 4)}
+    except Exception as e:
+        return {"path": path, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+# A feladatok szétosztása a folyamatkészletre, a run_batch-hez hasonlóan legfeljebb
+# workers * 4 beküldött feladattal. Az eredmények a befejezés sorrendjében jönnek.
+def _map_unordered(executor, workers, function, paths, *args):
+    pending = set()
+    queue = iter(paths)
+    max_in_flight = workers * 4
+
+    def submit_next():
+        for path in queue:
+            pending.add(executor.submit(function, path, *args))
+            if len(pending) >= max_in_flight:
+                break
+
+    submit_next()
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            yield future.result()
+        submit_next()
+
+
+# --- GYŰJTEMÉNY PALETTA ---
+
+# A képek közös palettája. Az options a PaletteExtractor paraméterei (n_colors, color_space...);
+# k_values megadásakor minden színszámra készül paletta ("palettes" kulcs, mint a batch módban).
+# deviations: ennyi, a közös palettától legjobban eltérő kép kerül az eredménybe (0 = nincs
+# második menet; több színszámnál a legnagyobb palettához mérve). Az on_error(record) a hibás
+# képek rekordjait kapja meg.
+# Visszatér egy JSON-ba írható rekorddal (a palette_export írói is ezt fogadják).
+def build_collection_palette(paths, options, workers=None, k_values=None, deviations=0,
+                             chunk_size=None, on_error=None):
+    import palette_engine
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or palette_engine.DEFAULT_CHUNK_SIZE
+    extractor = palette_engine.PaletteExtractor(**options)
+    start = time.perf_counter()
+    merged = palette_engine.ColorHistogram()
+    images = failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=palette_cli._init_worker) as executor:
+        for record in _map_unordered(executor, workers, histogram_file, paths, chunk_size):
+            if record["ok"]:
+                merged.merge_compact(record["histogram"])
+                images += 1
+            else:
+                failed += 1
+                if on_error:
+                    on_error(record)
+
+        collection = {"name": f"Gyűjtemény ({images} kép)", "ok": images > 0, "images": images,
+                      "failed": failed}
+        if images == 0:
+            collection["error"] = "Egyetlen kép sem dolgozható fel"
+            return collection
+
+        if k_values:
+            results = {k: extractor.extract_histogram(merged, k) for k in sorted(set(k_values))}
+            collection["palettes"] = {str(k): result.to_dict() for k, result in results.items()}
+            palette = results[max(results)]
+        else:
+            palette = extractor.extract_histogram(merged)
+            collection.update(palette.to_dict())
+
+        # A legjobban eltérő képek: egy legfeljebb "deviations" elemű kupac, így a memória itt
+        # sem nő a képek számával
+        if deviations:
+            heap = []
+            colors = palette.colors.tolist()
+            for record in _map_unordered(executor, workers, deviation_file, paths, colors,
+                                         extractor.color_space, chunk_size):
+                if not record["ok"]:
+                    continue
+                item = (record["mean"], record["p95"], record["path"])
+                if len(heap) < deviations:
+                    heapq.heappush(heap, item)
+                else:
+                    heapq.heappushpop(heap, item)
+            collection["deviations"] = [
+                {"path": path, "mean": mean, "p95": p95}
+                for mean, p95, path in sorted(heap, reverse=True)
+            ]
+
+    collection["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return collection
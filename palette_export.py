@@ -0,0 +1,331 @@
+# Palettaexport több formátumba, folyamatos (streaming) írással.
+# Az író objektumok egyesével kapják a palettákat (pl. a kötegelt mód képenkénti rekordjait),
+# és rögtön a fájlba írják őket, így több ezer kép exportja is állandó memóriával fut:
+#   json    - egyetlen JSON tömb, a rekordok egyenként íródnak bele
+#   ndjson  - soronként egy JSON rekord (mint a "batch" parancs kimenete)
+#   csv     - soronként egy szín: paletta, sorszám, r, g, b, hex, képpontszám, arány
+#   gpl     - GIMP paletta (a színek neve a paletta nevét is tartalmazza)
+#   ase     - Adobe Swatch Exchange, palettánként egy színcsoporttal; a blokkok száma a fejlécben
+#             van, ezt a lezáráskor írja vissza
+#   html    - lapozható kontaktlap: oldalanként legfeljebb per_page paletta, a lapok egymásra
+#             hivatkoznak (lap.html, lap-2.html, ...)
+# A rekord formája a PaletteResult.to_dict() kimenete, kiegészítve a "path" vagy "name"
+# kulccsal; több színszámnál a "palettes" kulcs alatt színszámonként (lásd palette_cli).
+
+import csv
+import html
+import json
+import os
+import struct
+import sys
+
+# A támogatott formátumok és a hozzájuk tartozó kiterjesztések
+FORMATS = {
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "csv": ".csv",
+    "gpl": ".gpl",
+    "ase": ".ase",
+    "html": ".html",
+}
+
+# A HTML kontaktlap egy oldalán megjelenő paletták alapértelmezett száma
+DEFAULT_PAGE_SIZE = 100
+
+
+# A formátum a fájl kiterjesztéséből; None, ha nem ismert
+def format_for_path(path):
+    if not path:
+        return None
+    extension = os.path.splitext(path)[1].lower()
+    for name, format_extension in FORMATS.items():
+        if extension == format_extension or (name == "html" and extension == ".htm"):
+            return name
+    return None
+
+
+# Egy rekord palettái (név, színek) párokként. A színek {'rgb', 'hex', 'count', 'share'}
+# szótárak; a share a képpontszámokból számolódik, ha nincs megadva. A hibás rekordok
+# (ok: false) kimaradnak.
+def iter_palettes(record):
+    if not record.get("ok", True):
+        return
+    name = record.get("name") or record.get("path") or ""
+    if "palettes" in record:
+        for k, palette in record["palettes"].items():
+            yield f"{name} ({k} szín)", _with_shares(palette)
+    elif "colors" in record:
+        yield name, _with_shares(record)
+
+
+def _with_shares(palette):
+    total = palette.get("total") or sum(c.get("count", 0) for c in palette["colors"])
+    colors = []
+    for color in palette["colors"]:
+        color = dict(color)
+        if "share" not in color and "count" in color and total:
+            color["share"] = color["count"] / total
+        colors.append(color)
+    return colors
+
+
+# A GUI eredménylistájának (palette_engine.ResultList) rekordja az exporthoz
+def result_list_record(results):
+    colors = []
+    for index, (color, hex_code) in enumerate(zip(results.colors, results.hex_codes)):
+        entry = {"rgb": list(color), "hex": hex_code}
+        if results.shares is not None:
+            entry["share"] = results.shares[index]
+        colors.append(entry)
+    return {"name": results.title.rstrip(":"), "colors": colors}
+
+
+# --- ÍRÓK ---
+
+# Az írók közös alapja. A target egy fájlútvonal vagy egy már megnyitott (szöveges) fájl;
+# utóbbit a close() nem zárja be. A title a fájl (pl. GIMP paletta) neve.
+class PaletteWriter:
+
+    binary = False
+
+    def __init__(self, target, title=None):
+        if isinstance(target, str):
+            if self.binary:
+                self.file = open(target, "wb")
+            else:
+                self.file = open(target, "w", encoding="utf-8", newline="")
+            self.owns_file = True
+            self.title = title or os.path.splitext(os.path.basename(target))[0]
+        else:
+            if self.binary:
+                raise ValueError("Ez a formátum csak fájlba írható")
+            self.file = target
+            self.owns_file = False
+            self.title = title or "Paletta"
+        self.count = 0
+        self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # A fájl eleje (fejléc)
+    def start(self):
+        pass
+
+    # Egy rekord kiírása: alapesetben a palettái egyenként
+    def write(self, record):
+        for name, colors in iter_palettes(record):
+            self.write_palette(name, colors)
+            self.count += 1
+
+    def write_palette(self, name, colors):
+        raise NotImplementedError
+
+    # A fájl vége (lezáró rész), majd a fájl bezárása
+    def finish(self):
+        pass
+
+    def close(self):
+        if self.file is None:
+            return
+        self.finish()
+        if self.owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+        self.file = None
+
+
+# Soronként egy JSON rekord; minden sor után ürít, így a kimenet folyamatosan olvasható
+class NdjsonWriter(PaletteWriter):
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.count += 1
+
+
+# Egyetlen JSON tömb, a rekordok egyenként íródnak bele
+class JsonWriter(PaletteWriter):
+
+    def start(self):
+        self.file.write("[")
+
+    def write(self, record):
+        self.file.write(("," if self.count else "") + "\n" + json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def finish(self):
+        self.file.write("\n]\n")
+
+
+class CsvWriter(PaletteWriter):
+
+    def start(self):
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["palette", "index", "r", "g", "b", "hex", "count", "share"])
+
+    def write_palette(self, name, colors):
+        for index, color in enumerate(colors):
+            share = color.get("share")
+            self.writer.writerow([name, index, *color["rgb"], color["hex"], color.get("count", ""),
+                                  "" if share is None else f"{share:.6f}"])
+
+
+# GIMP paletta (.gpl). A formátum egyetlen palettát ír le, ezért több paletta esetén a színek
+# nevében szerepel, melyik palettából valók.
+class GplWriter(PaletteWriter):
+
+    def start(self):
+        self.file.write(f"GIMP Palette\nName: {self.title}\nColumns: 8\n#\n")
+
+    def write_palette(self, name, colors):
+        self.file.write(f"# {name}\n")
+        for index, color in enumerate(colors):
+            r, g, b = color["rgb"]
+            label = f"{name} #{index + 1} {color['hex']}" if name else color["hex"]
+            self.file.write(f"{r:3d} {g:3d} {b:3d}\t{label}\n")
+
+
+# Adobe Swatch Exchange (.ase): "ASEF" fejléc, verzió, a blokkok száma, majd a blokkok
+# (csoport kezdete, színek, csoport vége). A blokkok száma csak a végén ismert, ezért a
+# lezáráskor a fejlécbe visszaíródik.
+class AseWriter(PaletteWriter):
+
+    binary = True
+
+    GROUP_START = 0xC001
+    GROUP_END = 0xC002
+    COLOR_ENTRY = 0x0001
+    # A szín típusa: 2 = normál (nem globális, nem direkt szín)
+    COLOR_TYPE_NORMAL = 2
+
+    def start(self):
+        self.blocks = 0
+        self.file.write(b"ASEF" + struct.pack(">HHI", 1, 0, 0))
+
+    # Egy név kódolása: hossz (karakterben, a záró nullával), majd UTF-16BE szöveg és nulla
+    @staticmethod
+    def _name(name):
+        encoded = name.encode("utf-16-be") + b"\x00\x00"
+        return struct.pack(">H", len(encoded) // 2) + encoded
+
+    def _block(self, block_type, payload):
+        self.file.write(struct.pack(">HI", block_type, len(payload)) + payload)
+        self.blocks += 1
+
+    def write_palette(self, name, colors):
+        self._block(self.GROUP_START, self._name(name or self.title))
+        for color in colors:
+            r, g, b = (v / 255 for v in color["rgb"])
+            payload = self._name(color["hex"]) + b"RGB " + struct.pack(">fffH", r, g, b, self.COLOR_TYPE_NORMAL)
+            self._block(self.COLOR_ENTRY, payload)
+        self._block(self.GROUP_END, b"")
+
+    def finish(self):
+        self.file.seek(8)
+        self.file.write(struct.pack(">I", self.blocks))
+
+
+# Lapozható HTML kontaktlap. Oldalanként legfeljebb per_page paletta; egy oldal akkor zárul le,
+# amikor a következő oldal első palettája megérkezik (így a "Következő" hivatkozás csak
+# akkor kerül rá, ha valóban van következő oldal). Egyszerre csak egy oldal van nyitva.
+class HtmlContactSheet(PaletteWriter):
+
+    def __init__(self, target, title=None, per_page=DEFAULT_PAGE_SIZE):
+        if not isinstance(target, str):
+            raise ValueError("A HTML kontaktlap csak fájlba írható")
+        self.path = target
+        self.per_page = per_page
+        self.page = 0
+        self.on_page = 0
+        super().__init__(target, title)
+
+    # Az n-edik oldal fájlneve: az első a megadott név, a többi "-n" végződést kap
+    def page_path(self, page):
+        if page == 1:
+            return self.path
+        root, extension = os.path.splitext(self.path)
+        return f"{root}-{page}{extension}"
+
+    def start(self):
+        self.page = 1
+        self._page_header()
+
+    def _page_header(self):
+        title = html.escape(self.title)
+        self.file.write(f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title} - {self.page}. oldal</title>
+<style>
+body {{ font-family: sans-serif; padding: 20px; }}
+h1 {{ color: #333; }}
+.sheet-item {{ margin-bottom: 16px; }}
+.sheet-name {{ font-weight: bold; margin-bottom: 4px; word-break: break-all; }}
+.sheet-strip {{ display: flex; height: 48px; border: 1px solid #ccc; border-radius: 4px; overflow: hidden; }}
+.sheet-codes {{ font-size: 12px; color: #555; margin-top: 4px; }}
+.sheet-nav {{ margin: 20px 0; }}
+</style>
+</head>
+<body>
+<h1>{title} - {self.page}. oldal</h1>
+""")
+
+    def _page_footer(self, has_next):
+        links = []
+        if self.page > 1:
+            links.append(f'<a href="{html.escape(os.path.basename(self.page_path(self.page - 1)))}">Előző</a>')
+        if has_next:
+            links.append(f'<a href="{html.escape(os.path.basename(self.page_path(self.page + 1)))}">Következő</a>')
+        self.file.write(f'<div class="sheet-nav">{" | ".join(links)}</div>\n</body>\n</html>\n')
+
+    def write_palette(self, name, colors):
+        if self.on_page >= self.per_page:
+            # Az oldal megtelt: lezárja, és új oldalt nyit
+            self._page_footer(has_next=True)
+            self.file.close()
+            self.page += 1
+            self.on_page = 0
+            self.file = open(self.page_path(self.page), "w", encoding="utf-8")
+            self._page_header()
+
+        # A sávok szélessége a színek arányával arányos (arány híján egyenlő)
+        spans = []
+        for color in colors:
+            weight = color.get("share")
+            weight = 1.0 if weight is None else max(weight, 0.0)
+            spans.append(f'<span title="{color["hex"]}" style="background: {color["hex"]}; '
+                         f'flex-grow: {weight:.6f}; flex-basis: 0;"></span>')
+        codes = " ".join(color["hex"] for color in colors)
+        self.file.write(f'<div class="sheet-item"><div class="sheet-name">{html.escape(name)}</div>'
+                        f'<div class="sheet-strip">{"".join(spans)}</div>'
+                        f'<div class="sheet-codes">{codes}</div></div>\n')
+        self.on_page += 1
+
+    def finish(self):
+        self._page_footer(has_next=False)
+
+
+# A formátumok írói
+WRITERS = {
+    "json": JsonWriter,
+    "ndjson": NdjsonWriter,
+    "csv": CsvWriter,
+    "gpl": GplWriter,
+    "ase": AseWriter,
+    "html": HtmlContactSheet,
+}
+
+
+# Író megnyitása; a formátum alapértelmezetten a fájl kiterjesztéséből jön.
+# A target None esetén a szabványos kimenet (csak szöveges formátumoknál).
+def open_writer(target, format=None, **options):
+    format = format or format_for_path(target if isinstance(target, str) else None)
+    if format not in WRITERS:
+        raise ValueError(f"Ismeretlen exportformátum: {format} (választható: {', '.join(WRITERS)})")
+    return WRITERS[format](sys.stdout if target is None else target, **options)
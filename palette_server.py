@@ -0,0 +1,329 @@
+# Hosszan futó palettaszolgáltatás helyi HTTP/JSON felülettel.
+# Használat:
+#   python ddcolors.py serve --port 8765 -j 4
+#   curl --data-binary @kep.jpg "http://127.0.0.1:8765/extract?colors=8&color_space=lab"
+# A szerver egy asyncio eseményhurokban fogadja a kéréseket, a klaszterezést pedig egy
+# előre elindított (és bemelegített) folyamatkészlet végzi, így kérésenként nem kell új
+# Python folyamatot indítani és a sklearn-t, Pillow-t újra importálni.
+# Egyszerre legfeljebb workers + queue_size kép van feltöltés vagy feldolgozás alatt, illetve
+# sorban; ha a sor megtelt, a szerver azonnal 429-cel (Too Many Requests) válaszol, Retry-After
+# fejléccel. A hely már a fejlécek után foglalódik le, a törzs beolvasása előtt, így a memóriában
+# tartott képek száma (és mérete, lásd MAX_BODY_BYTES) korlátos; az elutasított kérés törzsét
+# a szerver be sem olvassa, hanem lezárja a kapcsolatot.
+# Ha egy munkafolyamat leáll (pl. egy óriási képnél elfogy a memória), a folyamatkészlet
+# használhatatlanná válik; ilyenkor a szerver újat indít és bemelegíti, a félbemaradt kérések
+# pedig 503-at (Service Unavailable) kapnak.
+#
+# Végpontok:
+#   POST /extract    - a kérés törzse a képfájl tartalma; a válasz ugyanaz a JSON rekord, mint a
+#                      "batch" parancs egy sora. Lekérdezési paraméterek: colors (8, 2-32 vagy
+#                      4,8,16), algorithm, color_space, max_samples, backend, timings (1 esetén
+#                      a válaszban a szakaszonkénti idők is szerepelnek)
+#   GET  /health     - állapot és számlálók (futó és sorban álló kérések, elutasítások)
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+
+import palette_cli
+import palette_engine
+
+# A kérés törzsének maximális mérete (bájt); a nagyobb képeket 413-mal utasítja el
+MAX_BODY_BYTES = 256 * 1024 * 1024
+
+# A fejlécek maximális száma egy kérésben
+MAX_HEADERS = 100
+
+# A HTTP állapotkódok szövege
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+# A folyamatkészlet indítási módja. A leállt készlet cseréjekor már vannak nyitott kliens
+# kapcsolatok; "fork" esetén ezeket az új munkafolyamatok is megörökölnék, és a kapcsolatok
+# nem zárulnának le. Ezért ahol lehet, a munkafolyamatok egy tiszta forkserver folyamatból indulnak.
+def _mp_context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+# Érvénytelen kérés; a status a válasz HTTP állapotkódja
+class HttpError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# A munkafolyamat bemelegítése: a lusta importok (sklearn, Pillow) és egy apró illesztés még az
+# első kérés előtt lefut, így az első kérés sem fizeti meg az indulás árát
+def _warm_up():
+    import numpy as np
+
+    pixels = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    palette_engine.PaletteExtractor(n_colors=4).extract(pixels)
+    return True
+
+
+class PaletteServer:
+
+    # options: a PaletteExtractor alapértelmezett paraméterei (a kérés felülírhatja őket);
+    # queue_size: ennyi kérés várakozhat a futók mögött, mielőtt a szerver 429-et ad
+    def __init__(self, host="127.0.0.1", port=8765, workers=1, queue_size=None, options=None, cache_path=None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.queue_size = workers * 4 if queue_size is None else queue_size
+        self.options = dict(options or {})
+        self.cache_path = cache_path
+        self.in_flight = 0
+        self.served = 0
+        self.rejected = 0
+        self.restarts = 0
+        self.started = time.time()
+        self.executor = None
+        # A leállt folyamatkészlet cseréje egyszerre csak egyszer fut
+        self.executor_lock = asyncio.Lock()
+        self.server = None
+
+    # A folyamatkészlet elindítása és bemelegítése, majd a figyelő socket megnyitása
+    async def start(self):
+        self.executor = await self.start_executor()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # A 0-s port esetén az operációs rendszer választ portot
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    # Egy új, bemelegített folyamatkészlet
+    async def start_executor(self):
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_mp_context(),
+                                       initializer=palette_cli._init_worker)
+        await asyncio.gather(*[loop.run_in_executor(executor, _warm_up) for _ in range(self.workers)])
+        return executor
+
+    # A leállt folyamatkészlet cseréje. Ha közben egy másik kérés már lecserélte, nem indít újat.
+    async def replace_executor(self, broken):
+        async with self.executor_lock:
+            if self.executor is not broken:
+                return
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = await self.start_executor()
+            self.restarts += 1
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    # A szerver leállítása (a folyamatban lévő feldolgozások befejeződnek)
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    # --- HTTP ---
+
+    # Egy kapcsolat kiszolgálása; a kapcsolat (keep-alive) több kérést is vihet egymás után
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as e:
+                    await self.send(writer, e.status, {"ok": False, "error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, length = request
+                received = []
+
+                # A törzset a végpont olvassa be, ha szüksége van rá (az /extract csak a hely
+                # lefoglalása után)
+                async def read_body():
+                    received.append(await reader.readexactly(length) if length else b"")
+                    return received[-1]
+
+                status, payload, extra_headers = await self.route(method, target, read_body)
+                # A be nem olvasott törzs (pl. 429 esetén) miatt a kapcsolat nem folytatható
+                keep_alive = headers.get("connection", "").lower() != "close" and (received or not length)
+                await self.send(writer, status, payload, keep_alive, extra_headers)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Egy kérés fejének beolvasása: (metódus, cél, fejlécek, a törzs hossza), vagy None, ha a kliens
+    # lezárta a kapcsolatot. A törzs a kapcsolaton marad, azt a végpont olvassa be.
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Érvénytelen kérés")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(400, "Túl sok fejléc")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "Érvénytelen Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"A kép legfeljebb {MAX_BODY_BYTES} bájt lehet")
+        return method.upper(), target, headers, length
+
+    # A válasz elküldése JSON törzzsel
+    async def send(self, writer, status, payload, keep_alive=True, extra_headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (extra_headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    # A kérés továbbítása a végpontnak; a read_body a kérés törzsét beolvasó korutin.
+    # Visszatér: (állapotkód, JSON törzs, extra fejlécek)
+    async def route(self, method, target, read_body):
+        url = urlsplit(target)
+        try:
+            if url.path == "/health":
+                if method != "GET":
+                    raise HttpError(405, "Csak GET kérés engedélyezett")
+                return 200, self.health(), None
+            if url.path == "/extract":
+                if method != "POST":
+                    raise HttpError(405, "Csak POST kérés engedélyezett")
+                return await self.extract(parse_qs(url.query), read_body)
+            raise HttpError(404, f"Ismeretlen végpont: {url.path}")
+        except HttpError as e:
+            return e.status, {"ok": False, "error": str(e)}, None
+        except asyncio.IncompleteReadError:
+            # A kliens a törzs közben bontotta a kapcsolatot; nincs kinek válaszolni
+            raise
+        except Exception as e:
+            # Pl. ha egy munkafolyamat összeomlott
+            return 500, {"ok": False, "error": f"{type(e).__name__}: {e}"}, None
+
+    # --- VÉGPONTOK ---
+
+    def health(self):
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "capacity": self.workers + self.queue_size,
+            "served": self.served,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    # A kép elemzése a folyamatkészletben. Ha a sor megtelt, azonnal 429-et ad vissza, még a kép
+    # beolvasása előtt; a lefoglalt hely a törzs beolvasásától a válaszig tart.
+    async def extract(self, query, read_body):
+        options, k_values = self.request_options(query)
+        timings = query.get("timings", ["0"])[-1] not in ("0", "", "false")
+        if self.in_flight >= self.workers + self.queue_size:
+            self.rejected += 1
+            return 429, {"ok": False, "error": "A szerver túlterhelt, próbáld újra később"}, {"Retry-After": "1"}
+
+        self.in_flight += 1
+        executor = self.executor
+        try:
+            body = await read_body()
+            if not body:
+                raise HttpError(400, "A kérés törzse üres (a képfájl tartalmát kell küldeni)")
+            loop = asyncio.get_running_loop()
+            record = await loop.run_in_executor(
+                executor, partial(palette_cli.analyze_bytes, body, options, self.cache_path, k_values, timings))
+        except BrokenProcessPool:
+            await self.replace_executor(executor)
+            return 503, {"ok": False, "error": "Egy munkafolyamat leállt (pl. elfogyott a memória); "
+                                               "a feldolgozók újraindultak, próbáld újra"}, {"Retry-After": "1"}
+        finally:
+            self.in_flight -= 1
+        self.served += 1
+        # A hibás kép (pl. nem felismerhető formátum) a kliens hibája
+        return (200 if record["ok"] else 400), record, None
+
+    # A PaletteExtractor paraméterei: a szerver alapértelmezései a kérés paramétereivel felülírva.
+    # Visszatér: (options, k_values), ahol k_values csak több színszám esetén nem None.
+    def request_options(self, query):
+        options = dict(self.options)
+        k_values = None
+        try:
+            if "colors" in query:
+                counts = palette_cli.parse_color_counts(query["colors"][-1])
+                options["n_colors"] = counts[0]
+                k_values = counts if len(counts) > 1 else None
+            if "algorithm" in query:
+                options["algorithm"] = query["algorithm"][-1]
+            if "color_space" in query:
+                options["color_space"] = query["color_space"][-1]
+            if "max_samples" in query:
+                options["max_samples"] = int(query["max_samples"][-1])
+            if "backend" in query:
+                options["backend"] = query["backend"][-1]
+        except (argparse.ArgumentTypeError, ValueError) as e:
+            raise HttpError(400, str(e))
+
+        # A paraméterek ellenőrzése még a munkafolyamat előtt, hogy a hiba 400 legyen
+        try:
+            palette_engine.PaletteExtractor(**options)
+        except (TypeError, ValueError) as e:
+            raise HttpError(400, str(e))
+        return options, k_values
+
+
+# A szerver futtatása a Ctrl+C megszakításig
+def serve(host, port, workers, queue_size, options, cache_path=None, log=None):
+    async def run():
+        server = PaletteServer(host, port, workers, queue_size, options, cache_path)
+        await server.start()
+        if log:
+            log(f"A palettaszolgáltatás fut: http://{server.host}:{server.port} "
+                f"({server.workers} munkafolyamat, sor: {server.queue_size})")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,187 @@
+# Szakaszonkénti idő- és memóriamérés az elemzésekhez, profilozó nélkül.
+# Egy Trace egy feladat (pl. kép betöltése és elemzése) szakaszait méri:
+#   decode     - a képfájl dekódolása
+#   convert    - RGB tömbbé alakítás
+#   hash       - a kép tartalmának hash-e (gyorsítótár kulcs)
+#   sample     - mintavétel
+#   histogram  - színhisztogram
+#   fit        - klaszterezés
+#   counts     - utófeldolgozás: a képpontok hozzárendelése a színekhez
+#   render     - kirajzolás (canvas, eredménypanel)
+#   export     - mentés
+#   import     - a GUI moduljainak importja (indulás)
+#   window     - az ablak felépítése és első megjelenése (indulás)
+#   prewarm    - a nehéz modulok előtöltése a háttérben (indulás)
+# A motor szakaszai a meglévő haladásjelzőn (progress) keresztül érkeznek: egy szakasz addig
+# tart, amíg a következő el nem kezdődik. A többi szakaszt a hívó jelöli a stage() blokkal.
+# Minden lezárt szakaszról egy esemény (szótár) készül, ami az on_event függvényhez is
+# eljut; a teljes mérés Chrome trace formátumban (chrome://tracing, Perfetto) menthető.
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# A szakaszok neve az összesítésben
+STAGE_LABELS = {
+    "decode": "dekódolás",
+    "convert": "konvertálás",
+    "hash": "azonosítás",
+    "sample": "mintavétel",
+    "histogram": "hisztogram",
+    "fit": "klaszterezés",
+    "counts": "képpontok hozzárendelése",
+    "render": "kirajzolás",
+    "export": "mentés",
+    "import": "importálás",
+    "window": "ablak",
+    "prewarm": "előtöltés",
+    "region": "kijelölés",
+}
+
+
+# A folyamat pillanatnyi memóriája (RSS) MB-ban; None, ha nem mérhető (pl. Windows alatt)
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Trace:
+
+    # name: a feladat neve (pl. "Elemzés"); on_event: minden lezárt szakasz eseményét megkapja;
+    # trace_memory: a tracemalloc-kal a szakaszonkénti csúcs foglalást is méri (a NumPy tömbök
+    # foglalásait is látja, de lassít, ezért alapból ki van kapcsolva)
+    def __init__(self, name="", on_event=None, trace_memory=False):
+        self.name = name
+        self.on_event = on_event
+        self.trace_memory = trace_memory
+        self.events = []
+        self.origin = time.perf_counter()
+        self._current = None
+        # A motor szakaszai háttérszálon, a kirajzolás a fő szálon zárulhat le
+        self._lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # Egy szakasz kezdete; az éppen futó szakaszt lezárja
+    def begin(self, stage, **info):
+        with self._lock:
+            self._close()
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+            self._current = {
+                "stage": stage,
+                "start": time.perf_counter(),
+                "cpu": time.process_time(),
+                "rss": _rss_mb(),
+                "info": info,
+            }
+
+    # Az éppen futó szakasz lezárása
+    def end(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        current, self._current = self._current, None
+        if current is None:
+            return
+        rss = _rss_mb()
+        event = {
+            "stage": current["stage"],
+            "start_s": round(current["start"] - self.origin, 6),
+            "elapsed_s": round(time.perf_counter() - current["start"], 6),
+            "cpu_s": round(time.process_time() - current["cpu"], 6),
+            "rss_mb": rss,
+            "rss_delta_mb": round(rss - current["rss"], 1) if rss is not None and current["rss"] is not None else None,
+        }
+        if self.trace_memory:
+            event["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        event.update(current["info"])
+        self.events.append(event)
+        if self.on_event:
+            self.on_event(event)
+
+    # Egy szakasz mérése with blokkal: with trace.stage("decode"): ...
+    @contextmanager
+    def stage(self, stage, **info):
+        self.begin(stage, **info)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    # A motor haladásjelzőjének megfelelő függvény (lásd palette_engine._report): új szakasz
+    # nevénél lezárja az előzőt és elindítja az újat, ugyanazon szakaszon belül nem mér
+    def progress(self, stage, fraction=0.0):
+        current = self._current
+        if current is None or current["stage"] != stage:
+            self.begin(stage)
+
+    # Egy meglévő haladásjelző kiegészítése a méréssel (a mérés előbb fut, utána a hívóé)
+    def wrap_progress(self, progress=None):
+        def wrapped(stage, fraction=0.0):
+            self.progress(stage, fraction)
+            if progress is not None:
+                progress(stage, fraction)
+        return wrapped
+
+    # A mérés lezárása; visszatér az összesítéssel
+    def finish(self):
+        self.end()
+        return self.summary()
+
+    # Szakaszonként az összes eltelt idő másodpercben, az első előfordulás sorrendjében
+    def summary(self):
+        totals = {}
+        for event in self.events:
+            totals[event["stage"]] = totals.get(event["stage"], 0.0) + event["elapsed_s"]
+        return {stage: round(seconds, 6) for stage, seconds in totals.items()}
+
+    # Rövid, olvasható összesítés (pl. az állapotsorba):
+    # "dekódolás 85 ms, klaszterezés 240 ms, összesen 340 ms"
+    def summary_text(self):
+        totals = self.summary()
+        parts = [f"{STAGE_LABELS.get(stage, stage)} {seconds * 1000:.0f} ms" for stage, seconds in totals.items()]
+        parts.append(f"összesen {sum(totals.values()) * 1000:.0f} ms")
+        return ", ".join(parts)
+
+    # A mérés Chrome trace eseményei (teljes időtartamú "X" események, mikroszekundumban)
+    def trace_events(self, pid=None, tid=None):
+        pid = os.getpid() if pid is None else pid
+        tid = threading.get_ident() if tid is None else tid
+        events = []
+        for event in self.events:
+            args = {k: v for k, v in event.items() if k not in ("stage", "start_s", "elapsed_s")}
+            events.append({
+                "name": event["stage"],
+                "cat": self.name,
+                "ph": "X",
+                "ts": round((self.origin + event["start_s"]) * 1e6),
+                "dur": round(event["elapsed_s"] * 1e6),
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            })
+        return events
+
+
+# Mérések mentése egy JSON trace fájlba (Chrome trace formátum). Ha a fájl már létezik,
+# az új események hozzáadódnak a meglévőkhöz, így egy munkamenet összes feladata egy fájlba kerül.
+def save_trace(path, traces):
+    events = []
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                events = json.load(f).get("traceEvents", [])
+        except (OSError, ValueError):
+            events = []
+    for trace in traces:
+        events.extend(trace.trace_events())
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,140 @@
+# Virtualizált eredménylista a bal oldali panelhez.
+# A korábbi megoldás minden színhez külön Frame-et, két Label-t és egy-két Button-t hozott
+# létre, így néhány száz színnél (pl. teljes hisztogram vagy egy köteg összevont palettája)
+# a widgetek létrehozása vitte el az időt. Itt egyetlen Canvas rajzolja a listát:
+#   - csak a látható sorok léteznek, a színes négyzet és a szöveg canvas elem,
+#   - görgetéskor a kilógó sorok elemei újrahasznosulnak (áthelyezés és átírás),
+#   - a sorok száma így a panel magasságától függ, nem a színek számától.
+# A megjelenített adat egy palette_engine.ResultList; a panel csak kirajzolja.
+
+import tkinter as tk
+
+# Egy sor magassága (képpont); három szövegsor (RGB, HEX, lefedettség) is elfér benne
+ROW_HEIGHT = 54
+
+# A színes négyzet szélessége és a sor belső margója
+SWATCH_WIDTH = 40
+PADDING = 5
+
+
+# A látható sorok indextartománya [first, last): top a látható terület teteje, height a magassága
+def visible_rows(top, height, n_rows, row_height=ROW_HEIGHT):
+    first = max(0, int(top // row_height))
+    last = min(n_rows, int((top + height) // row_height) + 1)
+    return first, max(first, last)
+
+
+# Egy újrahasznosítható sor: a canvas elemei és a hozzájuk tartozó gombok
+class _RowSlot:
+
+    def __init__(self, panel):
+        canvas = panel.canvas
+        self.index = None
+        self.swatch = canvas.create_rectangle(0, 0, 0, 0, outline="#999999", state="hidden")
+        self.text = canvas.create_text(0, 0, anchor="w", justify=tk.LEFT, state="hidden")
+        self.copy_button = tk.Button(canvas, text="Másolás", command=lambda: panel.copy_row(self.index))
+        self.copy_window = canvas.create_window(0, 0, window=self.copy_button, anchor="e", state="hidden")
+        self.delete_button = tk.Button(canvas, text="x", command=lambda: panel.delete_row(self.index))
+        self.delete_window = canvas.create_window(0, 0, window=self.delete_button, anchor="e", state="hidden")
+
+    # A sor kirajzolása a model index-edik színével, y magasságban
+    def show(self, canvas, model, index, y, width):
+        middle = y + ROW_HEIGHT / 2
+        canvas.coords(self.swatch, PADDING, y + PADDING, PADDING + SWATCH_WIDTH, y + ROW_HEIGHT - PADDING)
+        canvas.coords(self.text, 2 * PADDING + SWATCH_WIDTH, middle)
+        canvas.coords(self.copy_window, width - PADDING, middle)
+        if self.index != index:
+            canvas.itemconfigure(self.swatch, fill=model.hex_codes[index])
+            canvas.itemconfigure(self.text, text=model.row_text(index))
+            self.index = index
+        canvas.itemconfigure(self.swatch, state="normal")
+        canvas.itemconfigure(self.text, state="normal")
+        canvas.itemconfigure(self.copy_window, state="normal")
+        if model.removable:
+            # A törlés gomb a másolás gomb bal oldalán
+            canvas.coords(self.delete_window, width - 2 * PADDING - self.copy_button.winfo_reqwidth(), middle)
+            canvas.itemconfigure(self.delete_window, state="normal")
+        else:
+            canvas.itemconfigure(self.delete_window, state="hidden")
+
+    def hide(self, canvas):
+        self.index = None
+        for item in (self.swatch, self.text, self.copy_window, self.delete_window):
+            canvas.itemconfigure(item, state="hidden")
+
+
+class ResultsPanel:
+
+    # on_copy(hex_code): a "Másolás" gomb; on_delete(rgb_color): az "x" gomb (csak a törölhető
+    # listáknál, pl. a saját palettánál látszik)
+    def __init__(self, parent, on_copy, on_delete=None):
+        self.on_copy = on_copy
+        self.on_delete = on_delete
+        self.model = None
+        self.slots = []
+
+        self.title_label = tk.Label(parent, text="", anchor="w", font=("Arial", 10, "bold"))
+        self.title_label.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(5, 0))
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical")
+        self.canvas = tk.Canvas(parent, highlightthickness=0)
+        # A canvas minden nézetváltozáskor (görgetés, átméretezés) jelez; ilyenkor a látható
+        # sorok újra kiosztódnak
+        self.canvas.configure(yscrollcommand=self.on_view_change)
+        self.scrollbar.configure(command=self.canvas.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+
+    # Új lista megjelenítése (palette_engine.ResultList vagy None)
+    def show(self, model):
+        self.model = model
+        self.title_label.config(text=model.title if model else "")
+        for slot in self.slots:
+            slot.index = None
+        height = len(model) * ROW_HEIGHT if model else 0
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    # A görgetősáv frissítése és a látható sorok kirajzolása
+    def on_view_change(self, first, last):
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def on_mouse_wheel(self, event):
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    # Csak a látható sorok kirajzolása; a szükségesnél több sor elemei rejtve maradnak
+    def refresh(self):
+        n_rows = len(self.model) if self.model else 0
+        top = self.canvas.canvasy(0)
+        first, last = visible_rows(top, self.canvas.winfo_height(), n_rows)
+        while len(self.slots) < last - first:
+            self.slots.append(_RowSlot(self))
+
+        # A már jó sort mutató elemek maradnak, a többi a hiányzó sorokat kapja
+        wanted = set(range(first, last))
+        free = []
+        for slot in self.slots:
+            if slot.index in wanted:
+                wanted.discard(slot.index)
+            else:
+                free.append(slot)
+        width = self.canvas.winfo_width()
+        for slot in self.slots:
+            if slot.index is not None and first <= slot.index < last:
+                slot.show(self.canvas, self.model, slot.index, slot.index * ROW_HEIGHT, width)
+        for slot, index in zip(free, sorted(wanted)):
+            slot.show(self.canvas, self.model, index, index * ROW_HEIGHT, width)
+        for slot in free[len(wanted):]:
+            slot.hide(self.canvas)
+
+    # A sor gombjai a slot aktuális indexével hívják ezeket
+    def copy_row(self, index):
+        if self.model is not None and index is not None:
+            self.on_copy(self.model.hex_codes[index])
+
+    def delete_row(self, index):
+        if self.model is not None and index is not None and self.on_delete:
+            self.on_delete(self.model.colors[index])
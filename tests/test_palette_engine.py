@@ -0,0 +1,355 @@
+# A palette_engine és a rá épülő modulok (gyorsítótár, export, gyűjtemény) regressziós tesztjei
+# (python -m pytest)
+
+import struct
+
+import numpy as np
+import pytest
+
+import palette_engine
+
+
+# Tömörítetlen, csempézett RGB TIFF írása kézzel (a Pillow csak sávos TIFF-et ír)
+def write_tiled_tiff(path, array, tile=32):
+    height, width = array.shape[:2]
+    tiles = [array[y:y + tile, x:x + tile] for y in range(0, height, tile) for x in range(0, width, tile)]
+    tile_bytes = tile * tile * 3
+    # Fejléc, IFD (11 bejegyzés), majd a BitsPerSample, a csempék eltolásai és hosszai, végül az adat
+    n_entries = 11
+    bits_offset = 8 + 2 + 12 * n_entries + 4
+    offsets_offset = bits_offset + 6
+    counts_offset = offsets_offset + 4 * len(tiles)
+    data_offset = counts_offset + 4 * len(tiles)
+
+    def short(tag, value):
+        return struct.pack("<HHIHH", tag, 3, 1, value, 0)
+
+    ifd = b"".join([
+        short(256, width), short(257, height),
+        struct.pack("<HHII", 258, 3, 3, bits_offset),
+        short(259, 1), short(262, 2), short(277, 3), short(284, 1),
+        short(322, tile), short(323, tile),
+        struct.pack("<HHII", 324, 4, len(tiles), offsets_offset),
+        struct.pack("<HHII", 325, 4, len(tiles), counts_offset),
+    ])
+    with open(path, "wb") as f:
+        f.write(b"II*\x00" + struct.pack("<IH", 8, n_entries) + ifd + struct.pack("<I", 0))
+        f.write(struct.pack("<3H", 8, 8, 8))
+        f.write(struct.pack(f"<{len(tiles)}I", *[data_offset + i * tile_bytes for i in range(len(tiles))]))
+        f.write(struct.pack(f"<{len(tiles)}I", *[tile_bytes] * len(tiles)))
+        for part in tiles:
+            f.write(np.ascontiguousarray(part).tobytes())
+
+
+# A csempézett TIFF képpontjai sorfolytonos sorrendben jönnek, és a darabonkénti kinyerés
+# ugyanazt a palettát adja, mint a teljes kép
+def test_tiled_tiff_chunks_match_decoded_image(tmp_path):
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 256, (32, 64, 3), dtype=np.uint8)
+    array[:, 32:] //= 4
+    path = str(tmp_path / "csempezett.tif")
+    write_tiled_tiff(path, array)
+
+    with Image.open(path) as image:
+        assert len(image.tile) == 2
+        decoded = palette_engine.to_rgb_array(image)
+    np.testing.assert_array_equal(decoded, array)
+
+    chunks = np.concatenate(list(palette_engine.iter_pixel_chunks(path, chunk_size=100)))
+    np.testing.assert_array_equal(chunks, array.reshape(-1, 3))
+
+    extractor = palette_engine.PaletteExtractor(n_colors=4)
+    expected = extractor.extract(array).fingerprint()
+    for chunk_size in (100, 1000, 10000):
+        assert extractor.extract_file(path, chunk_size=chunk_size).fingerprint() == expected
+
+
+# Az alfa csatorna darabonkénti vizsgálata ugyanazt mondja, mint a teljes kép opaque_mask-ja,
+# a tömörítetlen (memóriába képzett) és a dekódolt úton is
+def test_has_transparency_matches_opaque_mask(tmp_path):
+    from PIL import Image
+
+    array = np.full((40, 30, 4), 255, dtype=np.uint8)
+    transparent = array.copy()
+    transparent[39, 29, 3] = 0
+    for name, pixels, options in [("fedett.tif", array, {}), ("atlatszo.tif", transparent, {}),
+                                  ("atlatszo_lzw.tif", transparent, {"compression": "tiff_lzw"}),
+                                  ("atlatszo.png", transparent, {})]:
+        path = str(tmp_path / name)
+        Image.fromarray(pixels, "RGBA").save(path, **options)
+        with Image.open(path) as image:
+            expected = palette_engine.opaque_mask(image) is not None
+        for chunk_size in (1, 100, 10000):
+            assert palette_engine.has_transparency(path, chunk_size) == expected
+
+
+# A ColorCounter képpontszámai megegyeznek a képpontonkénti hozzárendelésével (count_nearest),
+# a határon fekvő cellák és az azonos középpontok esetén is
+def test_color_counter_matches_count_nearest():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (20000, 3), dtype=np.uint8)
+    pixels[:5000] = (200, 10, 10)
+    for color_space in ("rgb", "lab"):
+        counter = palette_engine.ColorCounter(pixels, color_space, chunk_size=3000)
+        for k in (1, 2, 7, 32):
+            centers = palette_engine.rgb_to_space(rng.integers(0, 256, (k, 3)).astype(np.uint8), color_space)
+            if k == 7:
+                centers[3] = centers[1]
+            expected = palette_engine.count_nearest(pixels, centers, color_space=color_space)
+            np.testing.assert_array_equal(counter.counts(centers), expected)
+
+
+# Egy egyszínű képnek minden algoritmussal és megvalósítással egy színe van (nem n_colors azonos
+# színe nulla képpontszámokkal), a tartomány minden k-jára is
+def test_flat_image_has_one_color():
+    flat = np.full((40, 50, 3), 77, dtype=np.uint8)
+    for options in ({}, {"backend": "numpy"}, {"algorithm": "histogram"}, {"color_space": "lab"},
+                    {"max_samples": 0}):
+        extractor = palette_engine.PaletteExtractor(**options)
+        result = extractor.extract(flat)
+        assert result.colors.tolist() == [[77, 77, 77]] and result.counts.tolist() == [2000]
+        assert all(len(r) == 1 for r in extractor.extract_range(flat, range(2, 6)).values())
+
+
+# A teljes illesztés (max_samples=0) darabonkénti kinyerése sem függ a darabmérettől
+def test_full_fit_extract_file_is_chunk_invariant(tmp_path):
+    from PIL import Image
+
+    rng = np.random.default_rng(1)
+    array = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    array[:30] //= 3
+    path = str(tmp_path / "kep.tif")
+    Image.fromarray(array).save(path)
+    for backend in ("sklearn", "numpy"):
+        extractor = palette_engine.PaletteExtractor(n_colors=5, max_samples=0, backend=backend)
+        results = [extractor.extract_file(path, chunk_size=chunk_size) for chunk_size in (97, 1000, 100000)]
+        assert len({result.fingerprint() for result in results}) == 1
+        assert results[0].total == array.shape[0] * array.shape[1]
+        if backend == "numpy":
+            assert results[0].fingerprint() == extractor.extract(array).fingerprint()
+
+
+# Az átlátszó képpontok a könyvtári hívásoknál is kimaradnak: egy 120 000 képpontos RGBA képből,
+# amelynek 80 000 képpontja fedett, 80 000 képpont számít; include_transparent=True esetén mind
+def test_transparent_pixels_are_excluded_by_default(tmp_path):
+    from PIL import Image
+
+    rng = np.random.default_rng(2)
+    array = np.zeros((300, 400, 4), dtype=np.uint8)
+    array[:, :, :3] = rng.integers(0, 256, (300, 400, 3), dtype=np.uint8)
+    array[:200, :, 3] = 255
+    image = Image.fromarray(array, "RGBA")
+    paths = [str(tmp_path / "kep.png"), str(tmp_path / "kep.tif")]
+    for path in paths:
+        image.save(path)
+    for backend in ("sklearn", "numpy"):
+        extractor = palette_engine.PaletteExtractor(n_colors=4, backend=backend)
+        expected = extractor.extract(image).fingerprint()
+        assert extractor.extract(image).total == 80000
+        assert extractor.extract(array).fingerprint() == expected
+        assert all(r.total == 80000 for r in extractor.extract_range(image, range(2, 5)).values())
+        for path in paths:
+            for chunk_size in (1000, 1000000):
+                assert extractor.extract_file(path, chunk_size=chunk_size).fingerprint() == expected
+        everything = palette_engine.PaletteExtractor(n_colors=4, backend=backend, include_transparent=True)
+        assert everything.extract(image).total == 120000
+        assert everything.extract_file(paths[1], chunk_size=1000).total == 120000
+
+    # A mask a fedett képpontokkal metszve számít
+    selected = np.zeros((300, 400), dtype=bool)
+    selected[150:250] = True
+    assert palette_engine.PaletteExtractor(n_colors=4).extract(image, mask=selected).total == 20000
+
+
+# Egy jól elkülönülő, négyszínű paletta és véletlen képpontok a leképezés tesztjeihez
+PALETTE = [(0, 0, 0), (255, 255, 255), (200, 30, 30), (30, 60, 200)]
+
+
+def random_pixels(n, seed=3):
+    return np.random.default_rng(seed).integers(0, 256, (n, 3), dtype=np.uint8)
+
+
+# A keresőtáblás (lut) leképezés a cellák közepén pontosan az "exact" címkéit adja, a képpontok
+# túlnyomó többségén is egyezik, és a lefedettség mindkettővel minden képpontot beszámol
+def test_palette_mapper_lut_matches_exact():
+    for color_space in ("rgb", "lab"):
+        exact = palette_engine.PaletteMapper(PALETTE, color_space=color_space)
+        lut = palette_engine.PaletteMapper(PALETTE, method="lut", lut_bits=5, color_space=color_space)
+        levels = np.arange(32, dtype=np.uint8) * 8 + 4
+        centers = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), axis=-1).reshape(-1, 3)
+        assert np.array_equal(lut.labels(centers), exact.labels(centers))
+
+        pixels = random_pixels(20000)
+        assert (lut.labels(pixels) == exact.labels(pixels)).mean() > 0.95
+        image = pixels.reshape(100, 200, 3)
+        labels, counts = exact.map_image(image, chunk_size=777)
+        assert labels.shape == (100, 200) and counts.sum() == 20000
+        assert np.array_equal(counts, np.bincount(exact.labels(pixels), minlength=4))
+        coverage = lut.coverage(image)
+        assert coverage.total == 20000 and coverage.colors.tolist() == [list(c) for c in PALETTE]
+    assert exact.labels(np.array(PALETTE, dtype=np.uint8)).tolist() == [0, 1, 2, 3]
+
+
+# Lab és OKLab ismert értékek, oda-vissza alakítás és ΔE
+def test_lab_conversion_and_delta_e():
+    colors = np.array([(255, 255, 255), (0, 0, 0), (255, 0, 0)], dtype=np.uint8)
+    lab = palette_engine.rgb_to_space(colors, "lab")
+    assert np.allclose(lab, [(100, 0, 0), (0, 0, 0), (53.24, 80.09, 67.20)], atol=0.05)
+    oklab = palette_engine.rgb_to_space(colors, "oklab")
+    assert np.allclose(oklab, [(1, 0, 0), (0, 0, 0), (0.628, 0.2249, 0.1258)], atol=0.001)
+    # A lebegőpontos bemenet ugyanazt adja, mint a uint8
+    assert np.allclose(palette_engine.rgb_to_space(colors.astype(np.float64), "lab"), lab, atol=1e-3)
+
+    pixels = random_pixels(1000)
+    for color_space in ("lab", "oklab"):
+        points = palette_engine.rgb_to_space(pixels, color_space)
+        assert np.abs(palette_engine.space_to_rgb(points, color_space) - pixels).max() < 0.01
+
+    assert np.allclose(palette_engine.delta_e([(255, 255, 255)], [(0, 0, 0)]), [100], atol=0.01)
+    assert np.allclose(palette_engine.delta_e([(0, 0, 0), (3, 4, 0)], [(0, 0, 0), (0, 0, 0)], "rgb"), [0, 5])
+    assert palette_engine.delta_e([(10, 20, 30)], [(10, 20, 30)], "oklab")[0] == 0
+
+
+# Egy kétszínű rekord, ahogy a kötegelt mód írja (PaletteResult.to_dict() és név)
+def export_record():
+    result = palette_engine.PaletteResult(np.array([(200, 30, 30), (0, 0, 0)]), np.array([3, 1]))
+    return dict(result.to_dict(), ok=True, name="kep")
+
+
+# Az ASE fájl blokkjai: fejléc a blokkok számával, csoport kezdete, színek, csoport vége
+def test_ase_writer_block_layout(tmp_path):
+    import palette_export
+
+    path = str(tmp_path / "paletta.ase")
+    with palette_export.open_writer(path) as writer:
+        writer.write(export_record())
+    data = open(path, "rb").read()
+    assert data[:4] == b"ASEF" and struct.unpack(">HHI", data[4:12]) == (1, 0, 4)
+
+    def read_name(payload):
+        length = struct.unpack(">H", payload[:2])[0]
+        return payload[2:2 + 2 * length].decode("utf-16-be").rstrip("\x00"), payload[2 + 2 * length:]
+
+    blocks = []
+    offset = 12
+    while offset < len(data):
+        block_type, length = struct.unpack(">HI", data[offset:offset + 6])
+        blocks.append((block_type, data[offset + 6:offset + 6 + length]))
+        offset += 6 + length
+    assert offset == len(data)
+    assert [block_type for block_type, _ in blocks] == [0xC001, 0x0001, 0x0001, 0xC002]
+    assert read_name(blocks[0][1]) == ("kep", b"") and blocks[3][1] == b""
+    name, rest = read_name(blocks[1][1])
+    assert name == "#c81e1e" and rest[:4] == b"RGB "
+    assert np.allclose(struct.unpack(">fffH", rest[4:]), (200 / 255, 30 / 255, 30 / 255, 2))
+
+
+# A GIMP paletta és a CSV sorai (a CSV-ben a képpontszámokból számolt aránnyal)
+def test_gpl_and_csv_writers(tmp_path):
+    import csv
+    import palette_export
+
+    gpl_path, csv_path = str(tmp_path / "paletta.gpl"), str(tmp_path / "paletta.csv")
+    for path in (gpl_path, csv_path):
+        with palette_export.open_writer(path) as writer:
+            writer.write(export_record())
+            writer.write({"ok": False, "path": "hibas.png", "error": "OSError"})
+    assert open(gpl_path, encoding="utf-8").read().splitlines() == [
+        "GIMP Palette", "Name: paletta", "Columns: 8", "#", "# kep",
+        "200  30  30\tkep #1 #c81e1e", "  0   0   0\tkep #2 #000000"]
+    with open(csv_path, encoding="utf-8", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows == [["palette", "index", "r", "g", "b", "hex", "count", "share"],
+                    ["kep", "0", "200", "30", "30", "#c81e1e", "3", "0.750000"],
+                    ["kep", "1", "0", "0", "0", "#000000", "1", "0.250000"]]
+
+
+# A gyorsítótár: első hívás hiány, a második találat; az SQLite fájlból egy új példány is
+# visszaadja az eredményt, a memóriában pedig legfeljebb max_entries eredmény marad
+def test_analysis_cache_hits_and_sqlite_reload(tmp_path):
+    import palette_cache
+
+    image = random_pixels(3000).reshape(50, 60, 3)
+    path = str(tmp_path / "cache.sqlite")
+    cache = palette_cache.AnalysisCache(max_entries=2, path=path)
+    extractor = palette_engine.PaletteExtractor(n_colors=4, cache=cache, backend="numpy")
+    first = extractor.extract(image)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert extractor.extract(image).fingerprint() == first.fingerprint()
+    assert (cache.hits, cache.misses) == (1, 1)
+    extractor.extract(image, n_colors=3)
+    extractor.extract(image, n_colors=5)
+    assert len(cache) == 2
+    cache.close()
+
+    reloaded = palette_cache.AnalysisCache(path=path)
+    extractor.cache = reloaded
+    assert extractor.extract(image).fingerprint() == first.fingerprint()
+    assert reloaded.stats() == {"hits": 1, "misses": 0, "disk_hits": 1, "entries": 1}
+    assert extractor.extract(image).fingerprint() == first.fingerprint()
+    assert reloaded.disk_hits == 1
+    reloaded.close()
+
+
+# Hisztogramok összevonása: a merge és a tömör formából (compact) való összevonás ugyanazt adja,
+# mint a képpontok egy hisztogramba gyűjtése; a közös paletta minden kép képpontjait beszámolja
+def test_collection_merge(tmp_path):
+    from PIL import Image
+    import palette_collection
+
+    first, second = random_pixels(2000, seed=4), random_pixels(3000, seed=5) // 2
+    together = palette_engine.ColorHistogram().add(np.concatenate([first, second]))
+    merged = palette_engine.ColorHistogram().add(first).merge(palette_engine.ColorHistogram().add(second))
+    compact = palette_engine.ColorHistogram()
+    for pixels in (first, second):
+        compact.merge_compact(palette_engine.ColorHistogram().add(pixels).compact())
+    for histogram in (merged, compact):
+        assert np.array_equal(histogram.counts, together.counts)
+        assert np.allclose(histogram.sums, together.sums)
+    with pytest.raises(ValueError):
+        merged.merge(palette_engine.ColorHistogram(bits=4))
+
+    paths = [str(tmp_path / "egy.png"), str(tmp_path / "ketto.png"), str(tmp_path / "hibas.png")]
+    Image.fromarray(first.reshape(40, 50, 3)).save(paths[0])
+    Image.fromarray(second.reshape(50, 60, 3)).save(paths[1])
+    open(paths[2], "wb").write(b"nem kep")
+    errors = []
+    collection = palette_collection.build_collection_palette(paths, {"n_colors": 4, "backend": "numpy"},
+                                                             workers=1, deviations=2, on_error=errors.append)
+    assert collection["ok"] and (collection["images"], collection["failed"]) == (2, 1)
+    assert [record["path"] for record in errors] == [paths[2]]
+    assert collection["total"] == 5000 and len(collection["colors"]) == 4
+    assert collection["fingerprint"] == palette_engine.PaletteExtractor(
+        n_colors=4, backend="numpy").extract_histogram(together).fingerprint()
+    assert sorted(record["path"] for record in collection["deviations"]) == paths[:2]
+
+
+# Téglalap és lasszó kijelölés: a téglalap a kép kivágása (fordított sarkokkal is), a lasszó a
+# sokszög képpontjai, a maszk ezekkel metszve számít; PIL képre és tömbre ugyanaz
+def test_box_and_lasso_region_pixels():
+    from PIL import Image, ImageDraw
+
+    array = random_pixels(80 * 60).reshape(60, 80, 3)
+    image = Image.fromarray(array)
+    box = palette_engine.region_pixels(array, box=(50, 40, 10, 5))
+    assert np.array_equal(box, array[5:40, 10:50])
+    assert np.array_equal(palette_engine.region_pixels(image, box=(10, 5, 50, 40)), box)
+    assert np.array_equal(palette_engine.region_pixels(array, box=(-10, -10, 20, 200)), array[:, :20])
+
+    lasso = [(10, 10), (70, 15), (30, 55)]
+    outline = Image.new("L", (80, 60), 0)
+    ImageDraw.Draw(outline).polygon(lasso, fill=255)
+    inside = np.asarray(outline) > 0
+    selected = palette_engine.region_pixels(array, polygon=lasso)
+    assert selected.shape == (1, inside.sum(), 3)
+    assert np.array_equal(selected[0], array[inside])
+    assert np.array_equal(palette_engine.region_pixels(image, polygon=lasso), selected)
+
+    mask = np.zeros((60, 80), dtype=bool)
+    mask[:, 40:] = True
+    assert np.array_equal(palette_engine.region_pixels(array, polygon=lasso, mask=mask)[0], array[inside & mask])
+    for region in ({"box": (5, 5, 5, 30)}, {"box": (0, 0, 30, 30), "mask": mask}):
+        with pytest.raises(ValueError, match="üres"):
+            palette_engine.region_pixels(array, **region)
@@ -0,0 +1,98 @@
+# A palette_server regressziós tesztjei egy helyi (127.0.0.1, szabad port) szerveren
+
+import asyncio
+import io
+import json
+
+import numpy as np
+from PIL import Image
+
+import palette_server
+
+
+# Egy kis PNG kép tartalma
+def png_bytes():
+    pixels = np.zeros((32, 32, 3), dtype=np.uint8)
+    pixels[:, 16:] = (200, 30, 30)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+# Egy kérés feje; a törzset a hívó küldi el (vagy nem)
+def request_head(method, target, length):
+    return f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {length}\r\n\r\n".encode()
+
+
+# A válasz beolvasása: (állapotkód, fejlécek, JSON törzs)
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, headers, json.loads(body)
+
+
+# Egy teljes kérés egy új kapcsolaton
+async def fetch(port, method, target, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request_head(method, target, len(body)) + body)
+    await writer.drain()
+    try:
+        return await read_response(reader)
+    finally:
+        writer.close()
+
+
+async def exercise_server():
+    server = await palette_server.PaletteServer(port=0, workers=1, queue_size=0,
+                                                options={"backend": "numpy"}).start()
+    try:
+        image = png_bytes()
+        status, _, record = await fetch(server.port, "POST", "/extract?colors=2", image)
+        assert status == 200 and record["ok"]
+        assert sorted(color["hex"] for color in record["colors"]) == ["#000000", "#c81e1e"]
+
+        status, _, record = await fetch(server.port, "POST", "/extract?colors=sok", image)
+        assert status == 400 and not record["ok"]
+        status, _, record = await fetch(server.port, "POST", "/extract?algorithm=nincs", image)
+        assert status == 400
+        status, _, record = await fetch(server.port, "POST", "/extract", b"nem kep")
+        assert status == 400 and not record["ok"]
+
+        # Az első kérés lefoglalja az egyetlen helyet, még mielőtt a képet elküldené; a második
+        # kérés a törzse beolvasása nélkül 429-et kap, és a kapcsolata lezárul
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(request_head("POST", "/extract?colors=2", len(image)))
+        await writer.drain()
+        while server.in_flight == 0:
+            await asyncio.sleep(0.01)
+        busy_reader, busy_writer = await asyncio.open_connection("127.0.0.1", server.port)
+        busy_writer.write(request_head("POST", "/extract", len(image)))
+        await busy_writer.drain()
+        status, headers, _ = await read_response(busy_reader)
+        assert status == 429 and headers["retry-after"] == "1" and headers["connection"] == "close"
+        assert await busy_reader.read() == b""
+        busy_writer.close()
+
+        writer.write(image)
+        await writer.drain()
+        status, _, record = await read_response(reader)
+        assert status == 200 and record["ok"]
+        writer.close()
+
+        status, _, health = await fetch(server.port, "GET", "/health")
+        assert status == 200
+        assert health["rejected"] == 1 and health["in_flight"] == 0 and health["capacity"] == 1
+    finally:
+        await server.close()
+
+
+# 200 egy képre, 400 hibás paraméterre és nem felismerhető képre, 429 megtelt sornál
+def test_server_statuses_on_localhost():
+    asyncio.run(asyncio.wait_for(exercise_server(), 60))